@@ -1,22 +1,108 @@
 # ChromaDB Manager - Vector Store for Semantic Search
 import asyncio
-import json
+import time
+from collections import OrderedDict
 from typing import List, Dict, Any, Optional, Tuple
-from datetime import datetime
-import hashlib
+from datetime import datetime, timezone
 
 import chromadb
-from chromadb.config import Settings
-from chromadb.utils import embedding_functions
 import openai
 import numpy as np
+import orjson
+import xxhash
 from structlog import get_logger
 
 from .config import config
+from .embedders import get_embedding_function, quantize_embeddings, zero_vector
 
 
 logger = get_logger(__name__)
 
+# Coarse UTC timestamp shared by all store_* defaults, refreshed at most every 100ms
+_NOW_ISO_TTL = 0.1
+_now_iso_cache: Tuple[float, str] = (float("-inf"), "")
+
+
+def _now_iso() -> str:
+    """Current UTC time in ISO format, cached for _NOW_ISO_TTL seconds"""
+    global _now_iso_cache
+    now = time.monotonic()
+    if now - _now_iso_cache[0] > _NOW_ISO_TTL:
+        _now_iso_cache = (now, datetime.now(timezone.utc).isoformat())
+    return _now_iso_cache[1]
+
+
+def _as_float(value: Any, default: float = 0.0) -> float:
+    """Metadata float, passing through values that already are floats"""
+    if value is None:
+        return default
+    return value if type(value) is float else float(value)
+
+
+def _as_int(value: Any, default: int = 0) -> int:
+    """Metadata int, passing through values that already are ints"""
+    if value is None:
+        return default
+    return value if type(value) is int else int(value)
+
+
+def _clean_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Metadata ChromaDB accepts: None values dropped, non-scalar values stored as JSON strings"""
+    cleaned = {}
+    for key, value in metadata.items():
+        if value is None:
+            continue
+        if not isinstance(value, (str, int, float, bool)):
+            value = orjson.dumps(value, default=str).decode()
+        cleaned[key] = value
+    return cleaned
+
+
+def _delimited(values: List[str]) -> str:
+    """Encode a string list as '|a|b|' so one value can be matched with $contains '|a|'"""
+    return f"|{'|'.join(values)}|" if values else ""
+
+
+# Description templates for embedding text: (field, formatter) pairs, applied in order
+# to every field that is present and truthy, then joined with ". "
+_EXPERIMENT_DESCRIPTION_FIELDS = (
+    # Basic info
+    ("name", "Experiment: {}".format),
+    ("type", "Type: {}".format),
+    ("hypothesis", "Hypothesis: {}".format),
+    # Configuration
+    ("variants", lambda variants: "Variants: " + "; ".join(
+        f"{v.get('name', '')}: {v.get('description', '')}" for v in variants)),
+    # Results
+    ("outcome", "Outcome: {}".format),
+    ("conversion_rate", "Conversion rate improvement: {:.1%}".format),
+    # Context
+    ("target_segment", "Target segment: {}".format),
+    ("industry", "Industry: {}".format),
+    ("tags", lambda tags: "Tags: " + ", ".join(tags)),
+)
+
+_JOURNEY_DESCRIPTION_FIELDS = (
+    # Journey flow
+    ("journey_steps", lambda steps: "User journey: " + " -> ".join(
+        step.get("step_name", "") for step in steps)),
+    # User context
+    ("user_segment", "User segment: {}".format),
+    ("device_type", "Device: {}".format),
+    # Session info
+    ("session_duration", "Session duration: {} seconds".format),
+    ("conversion_outcome", "Outcome: {}".format),
+    ("value", "Value: ${:.2f}".format),
+)
+
+_OPTIMIZATION_DESCRIPTION_FIELDS = (
+    ("optimization_type", "Optimization type: {}".format),
+    ("strategy", "Strategy: {}".format),
+    ("improvement_percentage", "Improvement: {:.1f}%".format),
+    ("applied_to_segments", lambda segments: "Applied to segments: " + ", ".join(segments)),
+    ("description", "Description: {}".format),
+)
+
 
 class ExperimentVectorStore:
     """
@@ -34,34 +120,43 @@ class ExperimentVectorStore:
         self.collections = {}
         self.openai_client = openai.AsyncOpenAI(api_key=config.openai_api_key) if config.openai_api_key else None
         self._embedding_function = None
+        self._write_queues: Dict[str, asyncio.Queue] = {}
+        self._flush_tasks: Dict[str, asyncio.Task] = {}
+        self._inflight_flushes: set = set()
+        self._flush_semaphore = asyncio.Semaphore(config.chromadb_max_concurrent_flushes)
+        self._count_cache: Dict[str, Tuple[float, int]] = {}
+        self._recent_ids: "OrderedDict[str, None]" = OrderedDict()
         
     async def initialize(self):
-        """Initialize ChromaDB client and collections"""
+        """Initialize ChromaDB client and collections (idempotent)"""
+        if self.client is not None:
+            return
+        
         try:
             # Initialize ChromaDB client
-            self.client = chromadb.HttpClient(host=config.chromadb_host.split(':')[0], 
-                                            port=int(config.chromadb_host.split(':')[1]))
-            
-            # Set up embedding function
-            if config.openai_api_key:
-                self._embedding_function = embedding_functions.OpenAIEmbeddingFunction(
-                    api_key=config.openai_api_key,
-                    model_name=config.embedding_model
-                )
-            else:
-                # Fallback to sentence transformers
-                self._embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
-                    model_name="all-MiniLM-L6-v2"
-                )
+            self.client = await chromadb.AsyncHttpClient(host=config.chromadb_host_name,
+                                                         port=config.chromadb_port)
+            
+            # Embeddings are computed client-side; only the local fallback needs an embedding function
+            if not self.openai_client:
+                self._embedding_function = get_embedding_function()
             
             # Create collections
             await self._create_collections()
+            await self._warm_up_collections()
+            
+            # Start one batching writer per collection
+            for collection_name in self.collections:
+                self._write_queues[collection_name] = asyncio.Queue(maxsize=config.chromadb_write_queue_size)
+                self._flush_tasks[collection_name] = asyncio.create_task(self._flusher(collection_name))
             
             logger.info("ChromaDB initialized successfully", 
                        host=config.chromadb_host, 
                        collections=list(self.collections.keys()))
             
         except Exception as e:
+            # Leave the store uninitialized so a later initialize() can retry
+            self.client = None
             logger.error("Failed to initialize ChromaDB", error=str(e))
             raise
     
@@ -83,19 +178,37 @@ class ExperimentVectorStore:
             }
         }
         
-        for collection_name, collection_config in collection_configs.items():
-            try:
-                collection = self.client.get_or_create_collection(
-                    name=collection_name,
-                    embedding_function=self._embedding_function,
-                    metadata=collection_config["metadata"]
-                )
-                self.collections[collection_name] = collection
-                logger.info(f"Created/Retrieved collection: {collection_name}")
-                
-            except Exception as e:
-                logger.error(f"Failed to create collection {collection_name}", error=str(e))
-                raise
+        # The collections are independent, so create them concurrently (one round-trip instead of four)
+        async with asyncio.TaskGroup() as tg:
+            for collection_name, collection_config in collection_configs.items():
+                tg.create_task(self._create_collection(collection_name, collection_config))
+    
+    async def _create_collection(self, collection_name: str, collection_config: Dict[str, Any]):
+        """Create or retrieve a single ChromaDB collection"""
+        try:
+            collection = await self.client.get_or_create_collection(
+                name=collection_name,
+                embedding_function=None,  # embeddings are supplied by _embed_batch
+                metadata=collection_config["metadata"]
+            )
+            self.collections[collection_name] = collection
+            logger.info(f"Created/Retrieved collection: {collection_name}")
+            
+        except Exception as e:
+            logger.error(f"Failed to create collection {collection_name}", error=str(e))
+            raise
+    
+    async def _warm_up_collections(self):
+        """Issue one cheap query per collection so the first user query doesn't pay cold-start latency"""
+        results = await asyncio.gather(*(
+            collection.query(query_embeddings=[zero_vector()], n_results=1)
+            for collection in self.collections.values()
+        ), return_exceptions=True)
+        
+        # Empty collections may reject the query; the server is warm either way
+        for collection_name, result in zip(self.collections, results):
+            if isinstance(result, Exception):
+                logger.debug("Collection warm-up query failed", collection=collection_name, error=str(result))
     
     async def store_experiment_context(self, experiment_data: Dict[str, Any]) -> str:
         """
@@ -120,21 +233,17 @@ class ExperimentVectorStore:
                 "experiment_type": experiment_data.get("type", "unknown"),
                 "industry": experiment_data.get("industry", "general"),
                 "user_segment": experiment_data.get("target_segment", "all"),
-                "conversion_rate": float(experiment_data.get("conversion_rate", 0.0)),
-                "statistical_power": float(experiment_data.get("statistical_power", 0.0)),
+                "conversion_rate": _as_float(experiment_data.get("conversion_rate")),
+                "statistical_power": _as_float(experiment_data.get("statistical_power")),
                 "outcome": experiment_data.get("outcome", "pending"),
-                "sample_size": int(experiment_data.get("sample_size", 0)),
-                "duration_days": int(experiment_data.get("duration_days", 0)),
-                "timestamp": experiment_data.get("created_at", datetime.utcnow().isoformat()),
-                "tags": json.dumps(experiment_data.get("tags", []))
+                "sample_size": _as_int(experiment_data.get("sample_size")),
+                "duration_days": _as_int(experiment_data.get("duration_days")),
+                "timestamp": experiment_data.get("created_at", _now_iso()),
+                "tags": _delimited(experiment_data.get("tags", []))
             }
             
-            # Store in ChromaDB
-            self.collections[config.experiments_collection].add(
-                documents=[context_text],
-                metadatas=[metadata],
-                ids=[doc_id]
-            )
+            # Queue for batched write to ChromaDB
+            await self.store_document(config.experiments_collection, doc_id, context_text, metadata)
             
             logger.info("Stored experiment context", experiment_id=doc_id, outcome=metadata["outcome"])
             return doc_id
@@ -156,22 +265,18 @@ class ExperimentVectorStore:
             metadata = {
                 "user_id": journey_data.get("user_id"),
                 "user_segment": journey_data.get("user_segment", "unknown"),
-                "journey_length": int(journey_data.get("journey_length", 0)),
-                "session_duration": int(journey_data.get("session_duration", 0)),
+                "journey_length": _as_int(journey_data.get("journey_length")),
+                "session_duration": _as_int(journey_data.get("session_duration")),
                 "conversion_outcome": journey_data.get("conversion_outcome", "none"),
-                "value": float(journey_data.get("value", 0.0)),
+                "value": _as_float(journey_data.get("value")),
                 "device_type": journey_data.get("device_type", "unknown"),
                 "traffic_source": journey_data.get("traffic_source", "unknown"),
-                "experiment_variants": json.dumps(journey_data.get("experiment_variants", [])),
-                "timestamp": journey_data.get("timestamp", datetime.utcnow().isoformat())
+                "experiment_variants": orjson.dumps(journey_data.get("experiment_variants", [])).decode(),
+                "timestamp": journey_data.get("timestamp", _now_iso())
             }
             
-            # Store in ChromaDB
-            self.collections[config.user_journeys_collection].add(
-                documents=[context_text],
-                metadatas=[metadata],
-                ids=[doc_id]
-            )
+            # Queue for batched write to ChromaDB
+            await self.store_document(config.user_journeys_collection, doc_id, context_text, metadata)
             
             logger.info("Stored user journey", journey_id=doc_id, outcome=metadata["conversion_outcome"])
             return doc_id
@@ -189,19 +294,15 @@ class ExperimentVectorStore:
             metadata = {
                 "optimization_type": optimization_data.get("optimization_type"),
                 "outcome": optimization_data.get("outcome", "unknown"),
-                "improvement_percentage": float(optimization_data.get("improvement_percentage", 0.0)),
-                "applied_to_segments": json.dumps(optimization_data.get("applied_to_segments", [])),
+                "improvement_percentage": _as_float(optimization_data.get("improvement_percentage")),
+                "applied_to_segments": _delimited(optimization_data.get("applied_to_segments", [])),
                 "industry": optimization_data.get("industry", "general"),
                 "implementation_effort": optimization_data.get("implementation_effort", "unknown"),
-                "statistical_significance": float(optimization_data.get("statistical_significance", 0.0)),
-                "timestamp": optimization_data.get("timestamp", datetime.utcnow().isoformat())
+                "statistical_significance": _as_float(optimization_data.get("statistical_significance")),
+                "timestamp": optimization_data.get("timestamp", _now_iso())
             }
             
-            self.collections[config.optimization_patterns_collection].add(
-                documents=[context_text],
-                metadatas=[metadata],
-                ids=[doc_id]
-            )
+            await self.store_document(config.optimization_patterns_collection, doc_id, context_text, metadata)
             
             logger.info("Stored optimization pattern", optimization_id=doc_id, improvement=metadata["improvement_percentage"])
             return doc_id
@@ -210,8 +311,132 @@ class ExperimentVectorStore:
             logger.error("Failed to store optimization pattern", error=str(e))
             raise
     
+    async def store_document(self, collection_name: str, doc_id: str,
+                             document: str, metadata: Dict[str, Any]) -> str:
+        """Queue a document for the collection's batch writer and wait until it is stored"""
+        # doc_ids are content-derived, so a recently stored id means a redelivered document:
+        # skip it before paying for the embedding
+        if doc_id in self._recent_ids:
+            self._recent_ids.move_to_end(doc_id)
+            return doc_id
+        
+        # collection.add validates the whole batch, so a bad value must not reach it
+        metadata = _clean_metadata(metadata)
+        
+        future = asyncio.get_running_loop().create_future()
+        await self._write_queues[collection_name].put((doc_id, document, metadata, future))
+        return await future
+    
+    async def _flusher(self, collection_name: str):
+        """Drain a collection's write queue into batched `collection.add` calls"""
+        queue = self._write_queues[collection_name]
+        
+        while True:
+            # Block for the first item, then fill the batch until full or the flush interval elapses
+            batch = [await queue.get()]
+            deadline = asyncio.get_running_loop().time() + config.chromadb_flush_interval
+            
+            while len(batch) < config.max_batch_size:
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout=timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            # Hand the batch off so the next one can fill while this one is embedded and stored;
+            # the semaphore bounds in-flight batches across all collections
+            await self._flush_semaphore.acquire()
+            task = asyncio.create_task(self._flush_batch(collection_name, batch))
+            self._inflight_flushes.add(task)
+            task.add_done_callback(lambda t, n=len(batch): self._on_flush_done(t, queue, n))
+    
+    def _on_flush_done(self, task: asyncio.Task, queue: asyncio.Queue, batch_size: int):
+        """Release the flush slot and acknowledge the batch's queue items"""
+        self._inflight_flushes.discard(task)
+        self._flush_semaphore.release()
+        for _ in range(batch_size):
+            queue.task_done()
+    
+    async def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        """Embed texts into a float32 matrix (one row per text)"""
+        if self.openai_client:
+            response = await self.openai_client.embeddings.create(input=texts, model=config.embedding_model)
+            vectors = np.asarray([item.embedding for item in response.data], dtype=np.float32)
+            return quantize_embeddings(vectors) if config.embedding_quantization else vectors
+        
+        # The local embedder is synchronous and already quantizes when enabled; keep it off the loop
+        embeddings = await asyncio.to_thread(self._embedding_function, texts)
+        return np.asarray(embeddings, dtype=np.float32)
+    
+    async def _flush_batch(self, collection_name: str, batch: List[Tuple[str, str, Dict[str, Any], asyncio.Future]]):
+        """Write one batch to ChromaDB and resolve the waiting callers"""
+        # A repeated id would make collection.add reject the whole batch; write the first copy only
+        unique: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        for doc_id, document, metadata, _ in batch:
+            unique.setdefault(doc_id, (document, metadata))
+        ids = list(unique)
+        documents = [document for document, _ in unique.values()]
+        metadatas = [metadata for _, metadata in unique.values()]
+        futures = [(doc_id, future) for doc_id, _, _, future in batch]
+        
+        collection = self.collections[collection_name]
+        errors: Dict[str, Exception] = {}
+        try:
+            embeddings = list(await self._embed_batch(documents))
+        except Exception as e:
+            logger.error("Failed to embed ChromaDB batch", collection=collection_name,
+                        batch_size=len(batch), error=str(e))
+            for _, future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        try:
+            await collection.add(documents=documents, embeddings=embeddings, metadatas=metadatas, ids=ids)
+        except Exception as e:
+            if len(ids) == 1:
+                errors[ids[0]] = e
+            else:
+                # add rejects the whole batch for one bad document: retry one by one so only it fails
+                logger.warning("ChromaDB batch rejected, retrying per document", collection=collection_name,
+                              batch_size=len(ids), error=str(e))
+                for doc_id, document, embedding, metadata in zip(ids, documents, embeddings, metadatas):
+                    try:
+                        await collection.add(documents=[document], embeddings=[embedding],
+                                             metadatas=[metadata], ids=[doc_id])
+                    except Exception as doc_error:
+                        errors[doc_id] = doc_error
+        
+        if errors:
+            logger.error("Failed to store ChromaDB documents", collection=collection_name,
+                        failed=len(errors), error=str(next(iter(errors.values()))))
+            ids = [doc_id for doc_id in ids if doc_id not in errors]
+        
+        for doc_id in ids:
+            self._recent_ids[doc_id] = None
+        for doc_id, future in futures:
+            if future.done():
+                continue
+            error = errors.get(doc_id)
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(doc_id)
+        while len(self._recent_ids) > config.chromadb_recent_ids_size:
+            self._recent_ids.popitem(last=False)
+        
+        # Keep the cached document count roughly current without a server round-trip
+        if collection_name in self._count_cache:
+            refreshed_at, count = self._count_cache[collection_name]
+            self._count_cache[collection_name] = (refreshed_at, count + len(ids))
+        
+        logger.debug("Flushed ChromaDB batch", collection=collection_name, batch_size=len(batch))
+    
     async def semantic_search(self, query: str, collection_name: str, 
-                            n_results: int = 10, filters: Optional[Dict] = None) -> Dict[str, Any]:
+                            n_results: int = 10, filters: Optional[Dict] = None,
+                            min_similarity: Optional[float] = None) -> Dict[str, Any]:
         """
         Perform semantic search across specified collection
         
@@ -220,6 +445,7 @@ class ExperimentVectorStore:
             collection_name: Target collection name
             n_results: Number of results to return
             filters: Metadata filters
+            min_similarity: Drop results whose similarity score is below this value
             
         Returns:
             Search results with documents, metadata, and distances
@@ -229,8 +455,9 @@ class ExperimentVectorStore:
                 raise ValueError(f"Collection {collection_name} not found")
             
             # Perform semantic search
-            results = self.collections[collection_name].query(
-                query_texts=[query],
+            query_embeddings = await self._embed_batch([query])
+            results = await self.collections[collection_name].query(
+                query_embeddings=list(query_embeddings),
                 n_results=n_results,
                 where=filters,
                 include=["documents", "metadatas", "distances"]
@@ -240,19 +467,29 @@ class ExperimentVectorStore:
             formatted_results = {
                 "query": query,
                 "collection": collection_name,
-                "total_results": len(results["documents"][0]) if results["documents"] else 0,
+                "total_results": 0,
                 "results": []
             }
             
             if results["documents"] and results["documents"][0]:
-                for i in range(len(results["documents"][0])):
-                    result_item = {
-                        "document": results["documents"][0][i],
-                        "metadata": results["metadatas"][0][i],
-                        "similarity_score": 1 - results["distances"][0][i],  # Convert distance to similarity
-                        "distance": results["distances"][0][i]
-                    }
-                    formatted_results["results"].append(result_item)
+                distances = np.asarray(results["distances"][0], dtype=np.float32)
+                
+                # ChromaDB returns hits sorted by ascending distance, so the similarity
+                # threshold becomes a single cutoff index on the distance array
+                cutoff = len(distances)
+                if min_similarity is not None:
+                    cutoff = int(np.searchsorted(distances, 1.0 - min_similarity, side="right"))
+                distances = distances[:cutoff]
+                similarities = 1.0 - distances  # Convert distance to similarity
+                
+                formatted_results["results"] = [
+                    {"document": document, "metadata": metadata, "similarity_score": score, "distance": distance}
+                    for document, metadata, score, distance in zip(
+                        results["documents"][0][:cutoff], results["metadatas"][0][:cutoff],
+                        similarities.tolist(), distances.tolist()
+                    )
+                ]
+                formatted_results["total_results"] = len(formatted_results["results"])
             
             logger.info("Semantic search completed", query=query, collection=collection_name, 
                        results_count=formatted_results["total_results"])
@@ -271,16 +508,11 @@ class ExperimentVectorStore:
             query=experiment_description,
             collection_name=config.experiments_collection,
             n_results=20,
-            filters=filters
+            filters=filters,
+            min_similarity=min_similarity
         )
         
-        # Filter by minimum similarity
-        similar_experiments = [
-            result for result in results["results"] 
-            if result["similarity_score"] >= min_similarity
-        ]
-        
-        return similar_experiments
+        return results["results"]
     
     async def find_successful_optimization_patterns(self, context: str, 
                                                   improvement_threshold: float = 10.0) -> List[Dict[str, Any]]:
@@ -301,94 +533,39 @@ class ExperimentVectorStore:
     
     def _generate_experiment_description(self, experiment_data: Dict[str, Any]) -> str:
         """Generate comprehensive experiment description for embedding"""
-        description_parts = []
-        
-        # Basic info
-        if name := experiment_data.get("name"):
-            description_parts.append(f"Experiment: {name}")
-        
-        if exp_type := experiment_data.get("type"):
-            description_parts.append(f"Type: {exp_type}")
-        
-        if hypothesis := experiment_data.get("hypothesis"):
-            description_parts.append(f"Hypothesis: {hypothesis}")
-        
-        # Configuration
-        if variants := experiment_data.get("variants"):
-            variant_descriptions = [f"{v.get('name', '')}: {v.get('description', '')}" for v in variants]
-            description_parts.append(f"Variants: {'; '.join(variant_descriptions)}")
-        
-        # Results
-        if outcome := experiment_data.get("outcome"):
-            description_parts.append(f"Outcome: {outcome}")
-        
-        if conv_rate := experiment_data.get("conversion_rate"):
-            description_parts.append(f"Conversion rate improvement: {conv_rate * 100:.1f}%")
-        
-        # Context
-        if segment := experiment_data.get("target_segment"):
-            description_parts.append(f"Target segment: {segment}")
-        
-        if industry := experiment_data.get("industry"):
-            description_parts.append(f"Industry: {industry}")
-        
-        if tags := experiment_data.get("tags"):
-            description_parts.append(f"Tags: {', '.join(tags)}")
-        
-        return ". ".join(description_parts)
+        return ". ".join(
+            fmt(value) for key, fmt in _EXPERIMENT_DESCRIPTION_FIELDS
+            if (value := experiment_data.get(key))
+        )
     
     def _generate_journey_description(self, journey_data: Dict[str, Any]) -> str:
         """Generate user journey description for embedding"""
-        description_parts = []
-        
-        # Journey flow
-        if steps := journey_data.get("journey_steps"):
-            step_names = [step.get("step_name", "") for step in steps]
-            description_parts.append(f"User journey: {' -> '.join(step_names)}")
-        
-        # User context
-        if segment := journey_data.get("user_segment"):
-            description_parts.append(f"User segment: {segment}")
-        
-        if device := journey_data.get("device_type"):
-            description_parts.append(f"Device: {device}")
-        
-        # Session info
-        if duration := journey_data.get("session_duration"):
-            description_parts.append(f"Session duration: {duration} seconds")
-        
-        if outcome := journey_data.get("conversion_outcome"):
-            description_parts.append(f"Outcome: {outcome}")
-        
-        if value := journey_data.get("value"):
-            description_parts.append(f"Value: ${value:.2f}")
-        
-        return ". ".join(description_parts)
+        return ". ".join(
+            fmt(value) for key, fmt in _JOURNEY_DESCRIPTION_FIELDS
+            if (value := journey_data.get(key))
+        )
     
     def _generate_optimization_description(self, optimization_data: Dict[str, Any]) -> str:
         """Generate optimization pattern description for embedding"""
-        description_parts = []
-        
-        if opt_type := optimization_data.get("optimization_type"):
-            description_parts.append(f"Optimization type: {opt_type}")
-        
-        if strategy := optimization_data.get("strategy"):
-            description_parts.append(f"Strategy: {strategy}")
-        
-        if improvement := optimization_data.get("improvement_percentage"):
-            description_parts.append(f"Improvement: {improvement:.1f}%")
-        
-        if segments := optimization_data.get("applied_to_segments"):
-            description_parts.append(f"Applied to segments: {', '.join(segments)}")
-        
-        if description := optimization_data.get("description"):
-            description_parts.append(f"Description: {description}")
-        
-        return ". ".join(description_parts)
+        return ". ".join(
+            fmt(value) for key, fmt in _OPTIMIZATION_DESCRIPTION_FIELDS
+            if (value := optimization_data.get(key))
+        )
     
     def _generate_hash(self, text: str) -> str:
         """Generate consistent hash for text"""
-        return hashlib.md5(text.encode()).hexdigest()[:8]
+        return xxhash.xxh3_64_hexdigest(text.encode())[:8]
+    
+    async def _cached_count(self, collection_name: str, collection: Any) -> int:
+        """Collection document count, refreshed from the server at most every chromadb_count_cache_ttl seconds"""
+        now = time.monotonic()
+        cached = self._count_cache.get(collection_name)
+        if cached and now - cached[0] < config.chromadb_count_cache_ttl:
+            return cached[1]
+        
+        count = await collection.count()
+        self._count_cache[collection_name] = (now, count)
+        return count
     
     async def health_check(self) -> Dict[str, Any]:
         """Check ChromaDB health and collection status"""
@@ -400,7 +577,7 @@ class ExperimentVectorStore:
             }
             
             for collection_name, collection in self.collections.items():
-                count = collection.count()
+                count = await self._cached_count(collection_name, collection)
                 health_info["collections"][collection_name] = {
                     "document_count": count,
                     "status": "active"
@@ -419,9 +596,27 @@ class ExperimentVectorStore:
     
     async def close(self):
         """Clean up resources"""
+        # Let pending writes reach ChromaDB before stopping the batch writers
+        for queue in self._write_queues.values():
+            await queue.join()
+        
+        for task in self._flush_tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._flush_tasks.values(), return_exceptions=True)
+        self._flush_tasks.clear()
+        
         # ChromaDB client doesn't need explicit closing
         logger.info("ChromaDB manager closed")
 
 
-# Global instance
-vector_store = ExperimentVectorStore()
+# Global instance, built on first access (PEP 562) so importing this module stays cheap
+_vector_store: Optional[ExperimentVectorStore] = None
+
+
+def __getattr__(name: str) -> Any:
+    if name == "vector_store":
+        global _vector_store
+        if _vector_store is None:
+            _vector_store = ExperimentVectorStore()
+        return _vector_store
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
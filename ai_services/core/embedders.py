@@ -0,0 +1,103 @@
+# Embedding Functions - Lazy factories for ChromaDB embedders
+"""
+Embeddings are computed client-side and handed to ChromaDB as float32 arrays.
+With an OpenAI API key the vector store calls the embeddings API directly;
+otherwise it uses the local SentenceTransformer function built here, which is
+imported lazily because it pulls in sentence-transformers (and torch).
+
+With EMBEDDING_QUANTIZATION enabled, vectors are snapped to a symmetric INT8 grid
+before they are sent to ChromaDB. Collections use cosine distance, so the
+per-vector scale is irrelevant to ranking and does not need to be stored.
+"""
+
+from functools import lru_cache
+from typing import Any
+
+import numpy as np
+from structlog import get_logger
+
+from .config import config
+
+
+logger = get_logger(__name__)
+
+# Output dimensions of the embedding models we configure
+EMBEDDING_DIMENSIONS = {
+    "text-embedding-ada-002": 1536,
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "all-MiniLM-L6-v2": 384,
+}
+
+# Minimum cosine similarity between a float32 vector and its INT8 counterpart
+MIN_QUANTIZATION_FIDELITY = 0.99
+
+
+def get_embedding_dim() -> int:
+    """Dimension of the embeddings for the configured model"""
+    if config.embedding_dim:
+        return config.embedding_dim
+    model_name = config.embedding_model if config.openai_api_key else "all-MiniLM-L6-v2"
+    return EMBEDDING_DIMENSIONS.get(model_name, 1536)
+
+
+@lru_cache(maxsize=None)
+def zero_vector() -> np.ndarray:
+    """Shared float32 zero vector of the configured embedding dimension"""
+    vector = np.zeros(get_embedding_dim(), dtype=np.float32)
+    vector.setflags(write=False)
+    return vector
+
+
+def quantize_int8(embeddings: Any) -> np.ndarray:
+    """Quantize a batch of embeddings to INT8 with one symmetric scale per vector"""
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    scale = np.abs(vectors).max(axis=1, keepdims=True)
+    scale[scale == 0] = 1.0
+    return np.clip(np.round(vectors * (127.0 / scale)), -127, 127).astype(np.int8)
+
+
+def quantization_fidelity(embeddings: Any, quantized: np.ndarray) -> float:
+    """Lowest cosine similarity between the original vectors and their quantized form"""
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    codes = quantized.astype(np.float32)
+    dots = np.einsum("ij,ij->i", vectors, codes)
+    norms = np.linalg.norm(vectors, axis=1) * np.linalg.norm(codes, axis=1)
+    norms[norms == 0] = 1.0
+    return float((dots / norms).min()) if len(vectors) else 1.0
+
+
+def quantize_embeddings(embeddings: Any) -> np.ndarray:
+    """INT8-grid version of a batch of embeddings as float32, warning on low fidelity"""
+    quantized = quantize_int8(embeddings)
+    
+    fidelity = quantization_fidelity(embeddings, quantized)
+    if fidelity < MIN_QUANTIZATION_FIDELITY:
+        logger.warning("INT8 embedding fidelity below threshold",
+                      fidelity=fidelity, threshold=MIN_QUANTIZATION_FIDELITY)
+    
+    return quantized.astype(np.float32)
+
+
+def _build_quantized(base: Any) -> Any:
+    """Wrap an embedding function so it returns INT8-grid vectors"""
+    from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+    
+    class QuantizedEmbeddingFunction(EmbeddingFunction[Documents]):
+        def __call__(self, input: Documents) -> Embeddings:
+            return list(quantize_embeddings(base(input)))
+    
+    return QuantizedEmbeddingFunction()
+
+
+@lru_cache(maxsize=None)
+def get_embedding_function() -> Any:
+    """Build (once per process) the local embedding function used when OpenAI is not configured"""
+    # Requires the optional sentence-transformers install
+    from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
+    
+    embedding_function = SentenceTransformerEmbeddingFunction(model_name="all-MiniLM-L6-v2")
+    
+    if config.embedding_quantization:
+        return _build_quantized(embedding_function)
+    return embedding_function
@@ -0,0 +1,76 @@
+# Logging setup - structlog routed through a queue so rendering and writes stay off the event loop
+import atexit
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+import orjson
+import structlog
+
+from .config import config
+
+_listener: Optional[QueueListener] = None
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """Enqueue records as-is; formatting happens on the listener thread"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def _capture_exc_info(logger, method_name, event_dict):
+    """Grab the live exception tuple; formatting it is left to the listener thread"""
+    if event_dict.get("exc_info") is True:
+        event_dict["exc_info"] = sys.exc_info()
+    return event_dict
+
+
+def _render_json(event_dict, **kwargs) -> str:
+    return orjson.dumps(event_dict, default=str).decode()
+
+
+def configure_logging() -> None:
+    """Send structlog and stdlib logging through a background QueueListener (idempotent, per process)"""
+    global _listener
+    if _listener is not None:
+        return
+
+    timestamper = structlog.processors.TimeStamper(fmt="iso")
+
+    # Rendering (including exception formatting) runs in the listener thread
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(structlog.stdlib.ProcessorFormatter(
+        foreign_pre_chain=[structlog.stdlib.add_log_level, structlog.stdlib.add_logger_name, timestamper],
+        processors=[
+            structlog.stdlib.ProcessorFormatter.remove_processors_meta,
+            structlog.processors.format_exc_info,
+            structlog.processors.JSONRenderer(serializer=_render_json),
+        ],
+    ))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.handlers = [_DeferredQueueHandler(log_queue)]
+    root.setLevel(config.log_level.upper())
+
+    structlog.configure(
+        processors=[
+            structlog.stdlib.filter_by_level,
+            structlog.stdlib.add_log_level,
+            structlog.stdlib.add_logger_name,
+            timestamper,
+            _capture_exc_info,
+            structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
+        ],
+        logger_factory=structlog.stdlib.LoggerFactory(),
+        wrapper_class=structlog.stdlib.BoundLogger,
+        cache_logger_on_first_use=True,
+    )
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    # Drain whatever is still queued when the process exits
+    atexit.register(_listener.stop)
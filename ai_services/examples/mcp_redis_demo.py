@@ -4,12 +4,18 @@ MCP Redis Integration Demo
 
 This script demonstrates how Redis helps with MCP dataflow through the cache-aside pattern.
 It shows how each processor checks Redis first before hitting their respective databases.
+
+Set DEMO_VERBOSE=1 to also dump each sample payload.
 """
 
 import asyncio
-import json
+import os
+from collections import defaultdict
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, List, Set
+
+# Dump full sample payloads only when asked to
+_VERBOSE = os.environ.get('DEMO_VERBOSE') == '1'
 
 # Mock data for demonstration
 SAMPLE_DATA = {
@@ -49,53 +55,106 @@ SAMPLE_DATA = {
 
 
 class MockRedisProcessor:
-    """Mock Redis processor for demonstration"""
+    """Mock Redis processor for demonstration (in-memory, so operations are synchronous)"""
     
-    def __init__(self):
+    __slots__ = ('cache', '_hits', '_misses', 'tag_index', '_verbose')
+    
+    def __init__(self, verbose: bool = True):
         self.cache = {}
-        self.stats = {'hits': 0, 'misses': 0}
+        self._hits = 0
+        self._misses = 0
+        self.tag_index: Dict[str, Set[str]] = defaultdict(set)
+        self._verbose = verbose
     
-    async def get(self, key: str) -> Any:
+    def get(self, key: str) -> Any:
         """Get data from cache"""
         if key in self.cache:
-            self.stats['hits'] += 1
-            print(f"✅ CACHE HIT: {key}")
+            self._hits += 1
+            if self._verbose:
+                print(f"✅ CACHE HIT: {key}")
             return self.cache[key]
         else:
-            self.stats['misses'] += 1
-            print(f"❌ CACHE MISS: {key}")
+            self._misses += 1
+            if self._verbose:
+                print(f"❌ CACHE MISS: {key}")
             return None
     
-    async def set(self, key: str, value: Any, ttl: int = 3600):
-        """Set data in cache"""
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Hit and miss counters"""
+        return {'hits': self._hits, 'misses': self._misses}
+    
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups served from cache"""
+        lookups = self._hits + self._misses
+        return self._hits / lookups if lookups else 0.0
+    
+    def mget(self, keys: List[str]) -> List[Any]:
+        """Get several keys in one call (MGET), None for each miss"""
+        return [self.get(key) for key in keys]
+    
+    def set(self, key: str, value: Any, ttl: int = 3600, tags: Iterable[str] = ()):
+        """Set data in cache, indexing the key under each tag"""
         self.cache[key] = value
-        print(f"💾 CACHED: {key} (TTL: {ttl}s)")
+        for tag in tags:
+            self.tag_index[tag].add(key)
+        if self._verbose:
+            print(f"💾 CACHED: {key} (TTL: {ttl}s)")
     
-    async def exists(self, key: str) -> bool:
+    def exists(self, key: str) -> bool:
         """Check if key exists"""
         return key in self.cache
+    
+    def invalidate_tag(self, tag: str) -> List[str]:
+        """Remove every key stored under a tag and return the removed keys"""
+        removed = []
+        for key in self.tag_index.pop(tag, ()):
+            if self.cache.pop(key, None) is not None:
+                removed.append(key)
+        return removed
 
 
 class MockDatabaseProcessor:
     """Mock database processor that uses cache-aside pattern"""
     
-    def __init__(self, name: str, redis_processor: MockRedisProcessor):
+    __slots__ = ('name', 'redis', 'db_operations', '_verbose', '_key_prefix', '_key_builders')
+    
+    def __init__(self, name: str, redis_processor: MockRedisProcessor, verbose: bool = True):
         self.name = name
         self.redis = redis_processor
         self.db_operations = 0
+        self._verbose = verbose
+        
+        # Cache key builders per data type, closed over the lowercased processor name
+        self._key_prefix = prefix = name.lower()
+        self._key_builders = {
+            'experiment': lambda d: f"{prefix}:experiment:{d.get('experiment_id')}",
+            'assignment': lambda d: f"{prefix}:assignment:{d.get('experiment_id')}:{d.get('user_id')}",
+            'event': lambda d: f"{prefix}:event:{d.get('event_id')}",
+            'user_data': lambda d: f"{prefix}:user:{d.get('user_id')}"
+        }
     
     async def process_data(self, data: Dict[str, Any], data_type: str) -> Dict[str, Any]:
         """Process data with cache-aside pattern"""
-        print(f"\n🔄 {self.name} Processing {data_type} data...")
+        if self._verbose:
+            print(f"\n🔄 {self.name} Processing {data_type} data...")
         
         # 1. Generate cache key
         cache_key = self._generate_cache_key(data, data_type)
-        print(f"🔑 Cache key: {cache_key}")
+        if self._verbose:
+            print(f"🔑 Cache key: {cache_key}")
         
         # 2. Check cache first
-        cached_data = await self.redis.get(cache_key)
+        cached_data = self.redis.get(cache_key)
+        return await self.resolve(data, data_type, cache_key, cached_data)
+    
+    async def resolve(self, data: Dict[str, Any], data_type: str,
+                      cache_key: str, cached_data: Any) -> Dict[str, Any]:
+        """Finish a cache-aside lookup whose cache read has already been done"""
         if cached_data:
-            print(f"⚡ Returning cached data from {self.name}")
+            if self._verbose:
+                print(f"⚡ Returning cached data from {self.name}")
             return {
                 'status': 'cached',
                 'source': 'redis',
@@ -104,12 +163,13 @@ class MockDatabaseProcessor:
             }
         
         # 3. Cache miss - go to database
-        print(f"🗄️  Cache miss - querying {self.name} database...")
+        if self._verbose:
+            print(f"🗄️  Cache miss - querying {self.name} database...")
         db_result = await self._query_database(data, data_type)
         self.db_operations += 1
         
         # 4. Store in cache for next time
-        await self.redis.set(cache_key, db_result, ttl=3600)
+        self.redis.set(cache_key, db_result, ttl=3600)
         
         return {
             'status': 'fresh',
@@ -120,16 +180,10 @@ class MockDatabaseProcessor:
     
     def _generate_cache_key(self, data: Dict[str, Any], data_type: str) -> str:
         """Generate cache key based on data type"""
-        if data_type == 'experiment':
-            return f"{self.name.lower()}:experiment:{data.get('experiment_id')}"
-        elif data_type == 'assignment':
-            return f"{self.name.lower()}:assignment:{data.get('experiment_id')}:{data.get('user_id')}"
-        elif data_type == 'event':
-            return f"{self.name.lower()}:event:{data.get('event_id')}"
-        elif data_type == 'user_data':
-            return f"{self.name.lower()}:user:{data.get('user_id')}"
-        else:
-            return f"{self.name.lower()}:{data_type}:{data.get('id', 'unknown')}"
+        builder = self._key_builders.get(data_type)
+        if builder:
+            return builder(data)
+        return f"{self._key_prefix}:{data_type}:{data.get('id', 'unknown')}"
     
     async def _query_database(self, data: Dict[str, Any], data_type: str) -> Dict[str, Any]:
         """Simulate database query"""
@@ -173,22 +227,33 @@ async def demonstrate_cache_aside_pattern():
     # Process each data type
     for data_type, data in SAMPLE_DATA.items():
         print(f"\n📝 Processing {data_type.upper()} data:")
-        print(f"   Data: {json.dumps(data, indent=2, default=str)}")
+        if _VERBOSE:
+            import orjson
+            print("   Data:", orjson.dumps(data, option=orjson.OPT_INDENT_2).decode())
         
         # Route to appropriate processors
         destinations = routing_rules.get(data_type, ['PostgreSQL'])
         
+        # Build every database processor's cache key up front
+        lookups = []
         for destination in destinations:
             if destination == 'Redis':
                 # Redis processor handles caching
                 cache_key = f"redis:{data_type}:{data.get('id', 'unknown')}"
-                await redis_processor.set(cache_key, data, ttl=3600)
+                redis_processor.set(cache_key, data, ttl=3600)
                 print(f"💾 Redis cached {data_type} data")
             else:
-                # Database processors use cache-aside pattern
                 processor = processors[destination]
-                result = await processor.process_data(data, data_type)
-                print(f"   Result: {result['status']} from {result['source']}")
+                lookups.append((processor, processor._generate_cache_key(data, data_type)))
+        
+        # One MGET for all processors, then only the misses go to their databases concurrently
+        cached = redis_processor.mget([cache_key for _, cache_key in lookups])
+        results = await asyncio.gather(*(
+            processor.resolve(data, data_type, cache_key, cached_data)
+            for (processor, cache_key), cached_data in zip(lookups, cached)
+        ))
+        for result in results:
+            print(f"   Result: {result['status']} from {result['source']}")
     
     print("\n🔄 Simulating Repeated Requests (Cache Hits)...")
     print("-" * 45)
@@ -214,7 +279,7 @@ async def demonstrate_cache_aside_pattern():
     print("-" * 25)
     print(f"Redis Cache Hits: {redis_processor.stats['hits']}")
     print(f"Redis Cache Misses: {redis_processor.stats['misses']}")
-    print(f"Cache Hit Rate: {redis_processor.stats['hits'] / (redis_processor.stats['hits'] + redis_processor.stats['misses']) * 100:.1f}%")
+    print(f"Cache Hit Rate: {redis_processor.hit_rate * 100:.1f}%")
     
     for name, processor in processors.items():
         print(f"{name} DB Operations: {processor.db_operations}")
@@ -237,9 +302,9 @@ async def demonstrate_cache_invalidation():
     redis_processor = MockRedisProcessor()
     
     # Set some test data
-    await redis_processor.set("postgresql:experiment:exp_123", {"name": "Old Experiment"})
-    await redis_processor.set("postgresql:assignment:exp_123:user_1", {"variant": "A"})
-    await redis_processor.set("postgresql:assignment:exp_123:user_2", {"variant": "B"})
+    redis_processor.set("postgresql:experiment:exp_123", {"name": "Old Experiment"}, tags=("exp:exp_123",))
+    redis_processor.set("postgresql:assignment:exp_123:user_1", {"variant": "A"})
+    redis_processor.set("postgresql:assignment:exp_123:user_2", {"variant": "B"})
     
     print("\n📋 Current cache contents:")
     for key, value in redis_processor.cache.items():
@@ -248,10 +313,9 @@ async def demonstrate_cache_invalidation():
     # Simulate experiment update - invalidate all related cache
     print("\n🔄 Experiment updated - invalidating related cache...")
     
-    # Invalidate all experiment-related cache
-    keys_to_remove = [key for key in redis_processor.cache.keys() if 'experiment:exp_123' in key]
+    # Invalidate all experiment-related cache via the tag index (no keyspace scan)
+    keys_to_remove = redis_processor.invalidate_tag("exp:exp_123")
     for key in keys_to_remove:
-        del redis_processor.cache[key]
         print(f"   ❌ Removed: {key}")
     
     print(f"\n✅ Invalidated {len(keys_to_remove)} cache entries")
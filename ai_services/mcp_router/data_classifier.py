@@ -9,14 +9,61 @@ The Data Classifier analyzes incoming data and determines:
 This enables intelligent routing to appropriate data stores.
 """
 
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, FrozenSet, List, Optional, Sequence, Tuple
 from enum import Enum
+from functools import lru_cache
 import re
-from datetime import datetime
+import time
+from datetime import datetime, timezone
 from structlog import get_logger
 
 logger = get_logger(__name__)
 
+# Number of distinct data shapes whose classification is memoized
+CLASSIFICATION_CACHE_SIZE = 4096
+
+# Naive UTC clock at second resolution: (epoch second, datetime, ISO string)
+_clock_cache: Tuple[int, datetime, str] = (-1, datetime.min, "")
+
+
+def _refresh_clock() -> Tuple[int, datetime, str]:
+    """Recompute the cached clock when the current second has changed"""
+    global _clock_cache
+    second = time.time_ns() // 1_000_000_000
+    if second != _clock_cache[0]:
+        now = datetime.fromtimestamp(second, timezone.utc).replace(tzinfo=None)
+        _clock_cache = (second, now, now.isoformat())
+    return _clock_cache
+
+
+def _utc_now() -> datetime:
+    """Current naive UTC time, truncated to the second"""
+    return _refresh_clock()[1]
+
+
+def _now_iso() -> str:
+    """Current naive UTC time in ISO format, truncated to the second"""
+    return _refresh_clock()[2]
+
+
+def _scan_fields(data: Dict[str, Any]) -> Tuple[int, List[str]]:
+    """
+    One pass over the top-level fields: a rough payload size (key lengths plus
+    value lengths, without serializing) and the names of nested fields
+    """
+    size = 0
+    nested_fields = []
+    for key, value in data.items():
+        size += len(key)
+        if isinstance(value, (dict, list)):
+            nested_fields.append(key)
+            size += len(value)
+        elif isinstance(value, (str, bytes)):
+            size += len(value)
+        else:
+            size += 8
+    return size, nested_fields
+
 
 class DataType(Enum):
     """Data type classifications"""
@@ -46,6 +93,77 @@ class StorageType(Enum):
     CACHE = "cache"                # Redis - temporary/session data
 
 
+# Key signatures in detection order: data matches when it contains every key of a signature
+_TYPE_SIGNATURES = (
+    # Explicit type markers
+    (frozenset({'event_type'}), DataType.EVENT),
+    (frozenset({'event_name'}), DataType.EVENT),
+    (frozenset({'experiment_id', 'variants'}), DataType.EXPERIMENT),
+    (frozenset({'user_id', 'assignment_id'}), DataType.ASSIGNMENT),
+    (frozenset({'optimization_type'}), DataType.OPTIMIZATION),
+    (frozenset({'improvement_percentage'}), DataType.OPTIMIZATION),
+    # User-centric data
+    (frozenset({'user_id', 'profile'}), DataType.USER_DATA),
+    (frozenset({'user_id', 'preferences'}), DataType.USER_DATA),
+    (frozenset({'user_id', 'segment'}), DataType.USER_DATA),
+    # Analytics data
+    (frozenset({'metrics'}), DataType.ANALYTICS),
+    (frozenset({'aggregates'}), DataType.ANALYTICS),
+    (frozenset({'timestamp'}), DataType.ANALYTICS),
+    (frozenset({'dimensions'}), DataType.ANALYTICS),
+)
+
+# Fields that mark an event as carrying rich context (three or more required)
+_CONTEXT_INDICATORS = frozenset({
+    'user_journey', 'session_id', 'referrer', 'page_content',
+    'interaction_sequence', 'device_info', 'location',
+    'experiment_variants', 'personalization_data'
+})
+
+# Event types compared against data values, which may be unhashable, so kept as tuples
+_CRITICAL_EVENTS = ('conversion', 'signup', 'purchase', 'error')
+_PRIORITY_EVENTS = ('error', 'failure', 'conversion', 'purchase', 'signup')
+
+_AI_ENHANCE_TYPES = frozenset({DataType.EXPERIMENT, DataType.OPTIMIZATION})
+_OPERATIONAL_TYPES = frozenset({DataType.EXPERIMENT, DataType.ASSIGNMENT, DataType.USER_DATA})
+_ANALYTICAL_TYPES = frozenset({DataType.EVENT, DataType.ANALYTICS})
+_CACHED_TYPES = frozenset({DataType.ASSIGNMENT, DataType.USER_DATA})
+
+# Strong field indicators per data type, used for the confidence score
+_TYPE_INDICATORS = {
+    DataType.EXPERIMENT: ('experiment_id', 'variants', 'hypothesis'),
+    DataType.EVENT: ('event_type', 'event_name', 'timestamp'),
+    DataType.USER_DATA: ('user_id', 'profile', 'preferences'),
+    DataType.ASSIGNMENT: ('assignment_id', 'variant_id'),
+    DataType.OPTIMIZATION: ('optimization_type', 'improvement_percentage')
+}
+
+# Priority (1=highest) for specific event types, falling back to the data type's priority
+_EVENT_PRIORITIES = {
+    # Critical real-time events
+    (DataType.EVENT, 'error'): 1,
+    (DataType.EVENT, 'failure'): 1,
+    # Conversion events are high priority
+    (DataType.EVENT, 'conversion'): 3,
+    (DataType.EVENT, 'purchase'): 3
+}
+_TYPE_PRIORITIES = {
+    DataType.ASSIGNMENT: 2,     # User assignments need fast processing
+    DataType.EXPERIMENT: 4,     # Experiment data is moderately high priority
+    DataType.EVENT: 5,          # Regular events
+    DataType.USER_DATA: 6,      # User data updates
+    DataType.ANALYTICS: 7,      # Analytics and optimization can be lower priority
+    DataType.OPTIMIZATION: 7
+}
+
+_CLASSIFICATION_RULES = {
+    'priority_events': _PRIORITY_EVENTS,
+    'ai_enhancement_fields': ('content', 'description', 'text', 'journey', 'behavior'),
+    'real_time_types': ('assignment', 'critical_event'),
+    'semantic_storage_types': ('experiment', 'optimization', 'rich_event')
+}
+
+
 class DataClassifier:
     """
     AI-powered data classifier for intelligent routing decisions
@@ -56,9 +174,14 @@ class DataClassifier:
     - What AI enhancements to apply
     """
     
+    __slots__ = ('classification_rules', '_shape_cache')
+    
     def __init__(self):
         self.classification_rules = self._load_classification_rules()
         
+        # Shape-dependent part of classifications, memoized by (key set, event_type)
+        self._shape_cache = lru_cache(maxsize=CLASSIFICATION_CACHE_SIZE)(self._classify_features)
+        
     async def classify_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Classify incoming data for routing decisions
@@ -71,41 +194,35 @@ class DataClassifier:
         - ai_enhanced: Whether to apply AI processing
         - metadata: Additional classification metadata
         """
+        return self._classify_one(data)
+    
+    def classify_batch(self, items: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Classify a batch of records in one synchronous pass (classification does no I/O)"""
+        return [self._classify_one(data) for data in items]
+    
+    def _classify_one(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Classify a single record, falling back to safe defaults on failure"""
         try:
-            # Primary data type detection
-            data_type = self._detect_data_type(data)
-            
-            # Processing requirements
-            processing_type = self._determine_processing_type(data, data_type)
-            
-            # Storage destinations
-            storage_types = self._determine_storage_types(data, data_type)
-            
-            # Priority assessment  
-            priority = self._assess_priority(data, data_type)
-            
-            # AI enhancement determination
-            ai_enhanced = self._should_ai_enhance(data, data_type)
-            
-            # Additional metadata
-            metadata = self._extract_metadata(data, data_type)
+            # Routing decisions depend only on the data's keys and event_type
+            shape = self._classify_shape(data)
+            data_type = shape['data_type']
             
             classification = {
                 'data_type': data_type.value,
-                'processing_type': processing_type.value,
-                'storage_types': [st.value for st in storage_types],
-                'priority': priority,
-                'ai_enhanced': ai_enhanced,
-                'metadata': metadata,
-                'classified_at': datetime.utcnow().isoformat(),
-                'confidence_score': self._calculate_confidence(data, data_type)
+                'processing_type': shape['processing_type'],
+                'storage_types': list(shape['storage_types']),
+                'priority': shape['priority'],
+                'ai_enhanced': shape['ai_enhanced'],
+                'metadata': self._extract_metadata(data, data_type),
+                'classified_at': _now_iso(),
+                'confidence_score': shape['confidence_score']
             }
             
             logger.info("Data classified", 
                        data_type=data_type.value,
-                       storage_types=[st.value for st in storage_types],
-                       priority=priority,
-                       ai_enhanced=ai_enhanced)
+                       storage_types=classification['storage_types'],
+                       priority=shape['priority'],
+                       ai_enhanced=shape['ai_enhanced'])
             
             return classification
             
@@ -119,38 +236,44 @@ class DataClassifier:
                 'priority': 5,
                 'ai_enhanced': False,
                 'metadata': {},
-                'classified_at': datetime.utcnow().isoformat(),
+                'classified_at': _now_iso(),
                 'confidence_score': 0.0,
                 'classification_error': str(e)
             }
     
+    def _classify_shape(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Classification fields that follow from the data's shape, memoized per shape"""
+        event_type = data.get('event_type')
+        return self._shape_cache(
+            frozenset(data.keys()),
+            event_type if isinstance(event_type, str) else None
+        )
+    
+    def _classify_features(self, keys: FrozenSet[str], event_type: Optional[str]) -> Dict[str, Any]:
+        """Classify a data shape; the rules only test key presence and event_type"""
+        data = dict.fromkeys(keys)
+        if event_type is not None:
+            data['event_type'] = event_type
+        
+        # Primary data type detection
+        data_type = self._detect_data_type(data)
+        
+        return {
+            'data_type': data_type,
+            'processing_type': self._determine_processing_type(data, data_type).value,
+            'storage_types': tuple(st.value for st in self._determine_storage_types(data, data_type)),
+            'priority': self._assess_priority(data, data_type),
+            'ai_enhanced': self._should_ai_enhance(data, data_type),
+            'confidence_score': self._calculate_confidence(data, data_type)
+        }
+    
     def _detect_data_type(self, data: Dict[str, Any]) -> DataType:
         """Detect primary data type from structure and content"""
+        keys = data.keys()
         
-        # Check for explicit type markers
-        if 'event_type' in data or 'event_name' in data:
-            return DataType.EVENT
-            
-        if 'experiment_id' in data and 'variants' in data:
-            return DataType.EXPERIMENT
-            
-        if 'user_id' in data and 'assignment_id' in data:
-            return DataType.ASSIGNMENT
-            
-        if 'optimization_type' in data or 'improvement_percentage' in data:
-            return DataType.OPTIMIZATION
-            
-        # Check for user-centric data
-        if 'user_id' in data and any(k in data for k in ['profile', 'preferences', 'segment']):
-            return DataType.USER_DATA
-            
-        # Check for analytics data
-        if any(k in data for k in ['metrics', 'aggregates', 'timestamp', 'dimensions']):
-            return DataType.ANALYTICS
-            
-        # Default classification based on structure
-        if len(data) > 10 and 'timestamp' in data:
-            return DataType.EVENT
+        for signature, data_type in _TYPE_SIGNATURES:
+            if signature <= keys:
+                return data_type
             
         return DataType.UNKNOWN
     
@@ -159,7 +282,7 @@ class DataClassifier:
         
         # Real-time processing for critical events
         if data_type == DataType.EVENT:
-            if data.get('event_type') in ['conversion', 'signup', 'purchase', 'error']:
+            if data.get('event_type') in _CRITICAL_EVENTS:
                 return ProcessingType.REAL_TIME
             return ProcessingType.NEAR_REAL_TIME
             
@@ -168,7 +291,7 @@ class DataClassifier:
             return ProcessingType.REAL_TIME
             
         # AI-enhanced processing for experiments and optimizations
-        if data_type in [DataType.EXPERIMENT, DataType.OPTIMIZATION]:
+        if data_type in _AI_ENHANCE_TYPES:
             return ProcessingType.AI_ENHANCED
             
         # Batch processing for analytics and bulk data
@@ -186,15 +309,15 @@ class DataClassifier:
         storage_types = []
         
         # Operational data always goes to PostgreSQL
-        if data_type in [DataType.EXPERIMENT, DataType.ASSIGNMENT, DataType.USER_DATA]:
+        if data_type in _OPERATIONAL_TYPES:
             storage_types.append(StorageType.OPERATIONAL)
             
         # Analytics data goes to ClickHouse
-        if data_type in [DataType.EVENT, DataType.ANALYTICS]:
+        if data_type in _ANALYTICAL_TYPES:
             storage_types.append(StorageType.ANALYTICAL)
             
         # AI-enhanced data goes to ChromaDB
-        if data_type in [DataType.EXPERIMENT, DataType.OPTIMIZATION]:
+        if data_type in _AI_ENHANCE_TYPES:
             storage_types.append(StorageType.SEMANTIC)
             
         # Events with rich context get semantic storage too
@@ -202,7 +325,7 @@ class DataClassifier:
             storage_types.append(StorageType.SEMANTIC)
             
         # High-frequency access patterns get cache
-        if data_type in [DataType.ASSIGNMENT, DataType.USER_DATA]:
+        if data_type in _CACHED_TYPES:
             storage_types.append(StorageType.CACHE)
             
         # Ensure at least one storage type
@@ -213,42 +336,18 @@ class DataClassifier:
     
     def _assess_priority(self, data: Dict[str, Any], data_type: DataType) -> int:
         """Assess processing priority (1=highest, 10=lowest)"""
-        
-        # Critical real-time events
-        if data_type == DataType.EVENT and data.get('event_type') in ['error', 'failure']:
-            return 1
-            
-        # User assignments need fast processing
-        if data_type == DataType.ASSIGNMENT:
-            return 2
-            
-        # Conversion events are high priority
-        if data_type == DataType.EVENT and data.get('event_type') in ['conversion', 'purchase']:
-            return 3
-            
-        # Experiment data is moderately high priority
-        if data_type == DataType.EXPERIMENT:
-            return 4
-            
-        # Regular events
-        if data_type == DataType.EVENT:
-            return 5
-            
-        # User data updates
-        if data_type == DataType.USER_DATA:
-            return 6
-            
-        # Analytics and optimization can be lower priority
-        if data_type in [DataType.ANALYTICS, DataType.OPTIMIZATION]:
-            return 7
-            
-        return 8  # Default priority
+        event_type = data.get('event_type')
+        if isinstance(event_type, str):
+            priority = _EVENT_PRIORITIES.get((data_type, event_type))
+            if priority:
+                return priority
+        return _TYPE_PRIORITIES.get(data_type, 8)  # 8 is the default priority
     
     def _should_ai_enhance(self, data: Dict[str, Any], data_type: DataType) -> bool:
         """Determine if data should receive AI enhancement"""
         
         # Always enhance experiments and optimizations
-        if data_type in [DataType.EXPERIMENT, DataType.OPTIMIZATION]:
+        if data_type in _AI_ENHANCE_TYPES:
             return True
             
         # Enhance events with rich context
@@ -263,13 +362,7 @@ class DataClassifier:
     
     def _has_rich_context(self, data: Dict[str, Any]) -> bool:
         """Check if event data has rich contextual information"""
-        context_indicators = [
-            'user_journey', 'session_id', 'referrer', 'page_content',
-            'interaction_sequence', 'device_info', 'location',
-            'experiment_variants', 'personalization_data'
-        ]
-        
-        return sum(1 for indicator in context_indicators if indicator in data) >= 3
+        return len(_CONTEXT_INDICATORS & data.keys()) >= 3
     
     def _extract_metadata(self, data: Dict[str, Any], data_type: DataType) -> Dict[str, Any]:
         """Extract additional metadata for routing decisions"""
@@ -286,12 +379,10 @@ class DataClassifier:
         if 'experiment_id' in data:
             metadata['has_experiment_context'] = True
             
-        # Data size estimation
-        metadata['estimated_size'] = len(str(data))
+        # Data size estimation and nested data detection
+        metadata['estimated_size'], nested_fields = _scan_fields(data)
         metadata['field_count'] = len(data)
         
-        # Nested data detection
-        nested_fields = [k for k, v in data.items() if isinstance(v, (dict, list))]
         if nested_fields:
             metadata['has_nested_data'] = True
             metadata['nested_fields'] = nested_fields
@@ -302,11 +393,11 @@ class DataClassifier:
         """Calculate how recent the data is"""
         try:
             if isinstance(timestamp, str):
-                dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+                dt = datetime.fromisoformat(timestamp)  # accepts a trailing 'Z' on Python 3.11+
             else:
                 dt = timestamp
                 
-            age = datetime.utcnow() - dt.replace(tzinfo=None)
+            age = _utc_now() - dt.replace(tzinfo=None)
             
             if age.total_seconds() < 60:
                 return "very_recent"  # < 1 minute
@@ -329,25 +420,13 @@ class DataClassifier:
             confidence += 0.3
             
         # Strong field indicators
-        type_indicators = {
-            DataType.EXPERIMENT: ['experiment_id', 'variants', 'hypothesis'],
-            DataType.EVENT: ['event_type', 'event_name', 'timestamp'],
-            DataType.USER_DATA: ['user_id', 'profile', 'preferences'],
-            DataType.ASSIGNMENT: ['assignment_id', 'variant_id'],
-            DataType.OPTIMIZATION: ['optimization_type', 'improvement_percentage']
-        }
-        
-        if data_type in type_indicators:
-            matching_indicators = sum(1 for field in type_indicators[data_type] if field in data)
-            confidence += (matching_indicators / len(type_indicators[data_type])) * 0.2
+        indicators = _TYPE_INDICATORS.get(data_type)
+        if indicators:
+            matching_indicators = sum(1 for field in indicators if field in data)
+            confidence += (matching_indicators / len(indicators)) * 0.2
             
         return min(confidence, 1.0)
     
     def _load_classification_rules(self) -> Dict[str, Any]:
         """Load classification rules (could be from config/database)"""
-        return {
-            'priority_events': ['error', 'failure', 'conversion', 'purchase', 'signup'],
-            'ai_enhancement_fields': ['content', 'description', 'text', 'journey', 'behavior'],
-            'real_time_types': ['assignment', 'critical_event'],
-            'semantic_storage_types': ['experiment', 'optimization', 'rich_event']
-        }
+        return _CLASSIFICATION_RULES
@@ -15,27 +15,122 @@ The router makes intelligent decisions about data placement based on:
 """
 
 import asyncio
-import json
-from typing import Dict, Any, List, Optional
+import time
+from array import array
+from collections import deque
+from enum import IntEnum
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
-import traceback
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+import orjson
+import xxhash
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 from structlog import get_logger
 from contextlib import asynccontextmanager
 
 from ..core.config import config
+from ..core.logging_setup import configure_logging
 from ..core.chromadb_manager import vector_store
 from .data_classifier import DataClassifier
-from .routing_engine import RoutingEngine
+from .routing_engine import RoutingEngine, RoutingTask
 from .processors import PostgreSQLProcessor, ClickHouseProcessor, ChromaDBProcessor
 from .redis_processor import RedisProcessor
 
 
 logger = get_logger(__name__)
 
+# Naive UTC ISO timestamp shared by routing tasks and results, refreshed at most every millisecond
+_NOW_ISO_TTL_NS = 1_000_000
+_now_iso_cache: Tuple[int, str] = (-_NOW_ISO_TTL_NS, "")
+
+
+def _now_iso() -> str:
+    """Current UTC time in ISO format, cached for _NOW_ISO_TTL_NS"""
+    global _now_iso_cache
+    now = time.monotonic_ns()
+    if now - _now_iso_cache[0] >= _NOW_ISO_TTL_NS:
+        _now_iso_cache = (now, datetime.utcnow().isoformat())
+    return _now_iso_cache[1]
+
+
+class StatCounter(IntEnum):
+    """Router counters; the lowercased name is the key reported in statistics"""
+    TOTAL_PROCESSED = 0
+    POSTGRESQL_ROUTED = 1
+    CLICKHOUSE_ROUTED = 2
+    CHROMADB_ROUTED = 3
+    REDIS_ROUTED = 4
+    ERRORS = 5
+
+
+# Destination name -> counter bumped on a successful write
+_ROUTED_COUNTERS = {
+    'postgresql': StatCounter.POSTGRESQL_ROUTED,
+    'clickhouse': StatCounter.CLICKHOUSE_ROUTED,
+    'chromadb': StatCounter.CHROMADB_ROUTED,
+    'redis': StatCounter.REDIS_ROUTED
+}
+
+
+class RoutingBuffer:
+    """
+    Bounded FIFO of routing tasks for the queue workers
+    
+    A deque plus events instead of asyncio.Queue: consumers take whole
+    batches per wakeup, and put() waits while the buffer is full so
+    producers feel backpressure.
+    """
+    
+    def __init__(self, maxsize: int):
+        self._buf: deque = deque()
+        self._maxsize = maxsize
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+        self._all_done = asyncio.Event()
+        self._all_done.set()
+        self._unfinished = 0
+    
+    def __len__(self) -> int:
+        return len(self._buf)
+    
+    async def put(self, item: Any):
+        """Append an item, waiting while the buffer is full"""
+        while len(self._buf) >= self._maxsize:
+            self._not_full.clear()
+            await self._not_full.wait()
+        
+        self._buf.append(item)
+        self._unfinished += 1
+        self._all_done.clear()
+        self._not_empty.set()
+    
+    async def get_batch(self, max_items: int) -> List[Any]:
+        """Wait for at least one item, then take up to max_items"""
+        while not self._buf:
+            self._not_empty.clear()
+            await self._not_empty.wait()
+        
+        buf = self._buf
+        batch = [buf.popleft() for _ in range(min(max_items, len(buf)))]
+        self._not_full.set()
+        return batch
+    
+    def task_done(self, count: int = 1):
+        """Mark items taken by get_batch as processed"""
+        self._unfinished -= count
+        if self._unfinished <= 0:
+            self._unfinished = 0
+            self._all_done.set()
+    
+    async def join(self):
+        """Wait until every item put so far has been processed"""
+        await self._all_done.wait()
+
 
 class MCPRouter:
     """
@@ -56,22 +151,49 @@ class MCPRouter:
             'chromadb': ChromaDBProcessor(),
             'redis': RedisProcessor()
         }
-        self._processing_queue = asyncio.Queue()
-        self._processing_task = None
-        self.stats = {
-            'total_processed': 0,
-            'postgresql_routed': 0,
-            'clickhouse_routed': 0,
-            'chromadb_routed': 0,
-            'redis_routed': 0,
-            'errors': 0,
-            'started_at': datetime.utcnow()
+        # Destination name -> (processor, routed counter), resolved once
+        self._routes = {
+            name: (processor, _ROUTED_COUNTERS.get(name))
+            for name, processor in self.processors.items()
         }
+        self._processing_queue = RoutingBuffer(config.routing_queue_size)
+        self._processing_tasks: List[asyncio.Task] = []
+        self.batch_size = config.routing_batch_size
+        self.n_workers = config.routing_workers
+        self._counters = array('Q', [0] * len(StatCounter))
+        self._completed = 0
+        # Per-message logs are sampled; the ticker logs aggregate counters instead
+        self._log_mask = max(1, config.route_log_sample_rate) - 1
+        self._log_task: Optional[asyncio.Task] = None
+        self._started_at = datetime.utcnow()
+        self._started_ns = time.monotonic_ns()
         
+        # Event loop and in-flight routes for payloads submitted from other threads
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._submitted: set = set()
+        
+        # Backend health snapshot shared by /status requests within STATUS_CACHE_TTL
+        self._health_cache: Dict[str, Any] = {}
+        self._health_ts_ns = 0
+        self._health_lock = asyncio.Lock()
+        
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of the routing counters"""
+        stats: Dict[str, Any] = {counter.name.lower(): self._counters[counter] for counter in StatCounter}
+        stats['started_at'] = self._started_at
+        return stats
+    
+    @property
+    def processing_active(self) -> bool:
+        """Whether any queue worker is still running"""
+        return any(not task.done() for task in self._processing_tasks)
+    
     async def initialize(self):
         """Initialize all components"""
         try:
             logger.info("Initializing MCP Router...")
+            self._loop = asyncio.get_running_loop()
             
             # Initialize ChromaDB connection
             await vector_store.initialize()
@@ -80,9 +202,18 @@ class MCPRouter:
             for name, processor in self.processors.items():
                 await processor.initialize()
                 logger.info(f"Initialized {name} processor")
+                self._check_processor_pool(name, processor)
+            
+            # Start background processing workers, all pulling from the same queue
+            self._processing_tasks = [
+                asyncio.create_task(self._process_queue(worker_id))
+                for worker_id in range(self.n_workers)
+            ]
             
-            # Start background processing
-            self._processing_task = asyncio.create_task(self._process_queue())
+            self._log_task = asyncio.create_task(self._log_ticker())
+            
+            # Replace the route_data method with a closure that skips per-call attribute lookups
+            self.route_data = self._make_route_data()
             
             logger.info("MCP Router initialized successfully")
             
@@ -90,6 +221,17 @@ class MCPRouter:
             logger.error("Failed to initialize MCP Router", error=str(e))
             raise
     
+    def _check_processor_pool(self, name: str, processor: Any):
+        """Warn when a processor would make concurrent routing writes wait on threads or connections"""
+        concurrency = self.n_workers * self.batch_size
+        if not getattr(processor, 'is_async', True):
+            logger.warning(f"{name} processor runs a synchronous driver in threads",
+                           processor=name, concurrency=concurrency)
+        pool_size = getattr(processor, 'pool_size', None)
+        if pool_size is not None and pool_size < concurrency:
+            logger.warning(f"{name} processor pool is smaller than routing concurrency",
+                           processor=name, pool_size=pool_size, concurrency=concurrency)
+    
     async def route_data(self, data: Dict[str, Any], source: str = "kafka") -> Dict[str, Any]:
         """
         Main routing method - intelligently distribute data to appropriate stores
@@ -101,156 +243,273 @@ class MCPRouter:
         Returns:
             Routing results and destinations
         """
-        try:
+        # Only reached before initialize() installs the specialized closure on the instance
+        return await self._make_route_data()(data, source)
+    
+    def _make_route_data(self):
+        """Build route_data as a closure with its collaborators bound to locals"""
+        classify = self.classifier.classify_data
+        determine = self.routing_engine.determine_destinations
+        enqueue = self._processing_queue.put
+        gen_id = self._generate_routing_id
+        get_cached_route = self._get_cached_route
+        single_flight = self.processors['redis'].single_flight
+        counters = self._counters
+        log_mask = self._log_mask
+        TOTAL_PROCESSED = StatCounter.TOTAL_PROCESSED
+        ERRORS = StatCounter.ERRORS
+        
+        async def dispatch(data: Dict[str, Any], source: str, payload: bytes) -> Dict[str, Any]:
             # Classify the data
-            classification = await self.classifier.classify_data(data)
+            classification = await classify(data)
             
             # Determine routing destinations
-            destinations = await self.routing_engine.determine_destinations(data, classification)
+            destinations = await determine(data, classification)
             
             # Queue for async processing
-            routing_task = {
-                'data': data,
-                'classification': classification,
-                'destinations': destinations,
-                'source': source,
-                'timestamp': datetime.utcnow().isoformat(),
-                'routing_id': self._generate_routing_id(data)
-            }
+            routing_task = RoutingTask(
+                data=data,
+                classification=classification,
+                destinations=destinations,
+                source=source,
+                timestamp=_now_iso(),
+                routing_id=gen_id(payload),
+                payload=payload
+            )
             
-            await self._processing_queue.put(routing_task)
+            await enqueue(routing_task)
             
             # Update stats
-            self.stats['total_processed'] += 1
+            counters[TOTAL_PROCESSED] += 1
             
-            logger.info("Data queued for routing", 
-                       routing_id=routing_task['routing_id'],
-                       destinations=destinations,
-                       classification=classification)
+            if not counters[TOTAL_PROCESSED] & log_mask:
+                logger.info("Data queued for routing", 
+                           routing_id=routing_task.routing_id,
+                           destinations=destinations,
+                           classification=classification)
             
             return {
-                'routing_id': routing_task['routing_id'],
+                'routing_id': routing_task.routing_id,
                 'destinations': destinations,
                 'classification': classification,
-                'queued_at': routing_task['timestamp']
+                'queued_at': routing_task.timestamp
             }
-            
+        
+        async def route_data(data: Dict[str, Any], source: str = "kafka") -> Dict[str, Any]:
+            try:
+                # Serialize the payload once; the route cache, routing ID and processors reuse these bytes
+                payload = orjson.dumps(data, default=str,
+                                       option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+                
+                if not config.route_cache_enabled:
+                    return await dispatch(data, source, payload)
+                
+                # Redelivered payloads get their earlier routing result back without being queued again
+                route_cache_key = f"mcp:route:{xxhash.xxh3_128_hexdigest(payload)}"
+                cached_route = await get_cached_route(route_cache_key)
+                if cached_route is not None:
+                    logger.info("Duplicate payload - returning cached routing",
+                               routing_id=cached_route.get('routing_id'))
+                    return cached_route
+                
+                # Concurrent copies of a new payload are routed once; the others wait for its result
+                return await single_flight(route_cache_key, lambda: dispatch(data, source, payload),
+                                           config.route_cache_ttl)
+                
+            except Exception as e:
+                counters[ERRORS] += 1
+                logger.error("Failed to route data", error=str(e), data_type=type(data).__name__)
+                raise
+        
+        return route_data
+    
+    def submit_threadsafe(self, data: Dict[str, Any], source: str = "kafka"):
+        """
+        Route data from a thread other than the event loop's, without waiting for the result
+        
+        Cheaper than asyncio.run_coroutine_threadsafe(router.route_data(...)): no
+        coroutine or concurrent Future is created on the calling thread.
+        """
+        if self._loop is None:
+            raise RuntimeError("MCP Router is not initialized")
+        self._loop.call_soon_threadsafe(self._enqueue, data, source)
+    
+    def _enqueue(self, data: Dict[str, Any], source: str):
+        """Start routing a thread-submitted payload; runs on the event loop"""
+        task = self._loop.create_task(self.route_data(data, source))
+        self._submitted.add(task)
+        task.add_done_callback(self._submitted_done)
+    
+    def _submitted_done(self, task: asyncio.Task):
+        """Forget a finished thread-submitted route; route_data has already logged any failure"""
+        self._submitted.discard(task)
+        if not task.cancelled():
+            task.exception()
+    
+    async def _get_cached_route(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Look up a previous routing result; cache failures never block routing"""
+        try:
+            cached = await self.processors['redis'].redis_client.get(cache_key)
+            return orjson.loads(cached) if cached else None
         except Exception as e:
-            self.stats['errors'] += 1
-            logger.error("Failed to route data", error=str(e), data_type=type(data).__name__)
-            raise
+            logger.warning("Route cache lookup failed", cache_key=cache_key, error=str(e))
+            return None
     
-    async def _process_queue(self):
+    async def _process_queue(self, worker_id: int = 0):
         """Background task to process routing queue"""
-        logger.info("Started MCP Router processing queue")
+        logger.info("Started MCP Router processing queue", worker_id=worker_id)
         
         while True:
+            # Block for the next item, then take whatever else is already queued
+            batch = await self._processing_queue.get_batch(self.batch_size)
+            
             try:
-                # Get next item from queue
-                routing_task = await self._processing_queue.get()
-                
-                # Process the routing task
-                await self._execute_routing(routing_task)
+                # Process the batch of routing tasks concurrently
+                results = await asyncio.gather(
+                    *(self._execute_routing(routing_task) for routing_task in batch),
+                    return_exceptions=True
+                )
+                for result in results:
+                    if isinstance(result, Exception):
+                        logger.error("Error in processing queue", worker_id=worker_id, error=str(result))
                 
-                # Mark task as done
-                self._processing_queue.task_done()
-                
-            except Exception as e:
-                logger.error("Error in processing queue", error=str(e))
-                await asyncio.sleep(1)  # Brief pause before continuing
+            finally:
+                # Mark tasks as done
+                self._processing_queue.task_done(len(batch))
     
-    async def _execute_routing(self, routing_task: Dict[str, Any]):
+    async def _execute_routing(self, routing_task: RoutingTask):
         """Execute the actual data routing to destinations"""
-        data = routing_task['data']
-        destinations = routing_task['destinations']
-        routing_id = routing_task['routing_id']
+        data = routing_task.data
+        destinations = routing_task.destinations
+        routing_id = routing_task.routing_id
         
         results = {}
         
-        # Route to each destination
+        # Resolve each destination to its processor and counter once for this task
+        routes = []
         for destination in destinations:
-            try:
-                processor = self.processors.get(destination)
-                if not processor:
-                    logger.warning(f"No processor found for destination: {destination}")
-                    continue
-                
-                # Process data for this destination
-                result = await processor.process_data(data, routing_task)
-                results[destination] = {
-                    'status': 'success',
-                    'result': result,
-                    'processed_at': datetime.utcnow().isoformat()
-                }
-                
-                # Update stats
-                stat_key = f"{destination}_routed"
-                if stat_key in self.stats:
-                    self.stats[stat_key] += 1
-                
-                logger.info(f"Successfully routed to {destination}", 
-                           routing_id=routing_id, destination=destination)
-                
-            except Exception as e:
+            route = self._routes.get(destination)
+            if route is None:
+                logger.warning(f"No processor found for destination: {destination}")
+                continue
+            routes.append((destination, *route))
+        
+        # Fan out to every destination concurrently
+        gathered = await asyncio.gather(
+            *(processor.process_data(data, routing_task) for _, processor, _ in routes),
+            return_exceptions=True
+        )
+        
+        for (destination, _, counter), result in zip(routes, gathered):
+            if isinstance(result, BaseException):
                 results[destination] = {
                     'status': 'error',
-                    'error': str(e),
-                    'traceback': traceback.format_exc()
+                    'error': str(result),
+                    'error_type': type(result).__name__
                 }
-                self.stats['errors'] += 1
+                self._counters[StatCounter.ERRORS] += 1
                 logger.error(f"Failed to route to {destination}", 
-                           routing_id=routing_id, destination=destination, error=str(e))
+                           routing_id=routing_id, destination=destination, error=str(result))
+                continue
+            
+            results[destination] = {
+                'status': 'success',
+                'result': result,
+                'processed_at': _now_iso()
+            }
+            
+            # Update stats
+            if counter is not None:
+                self._counters[counter] += 1
+                if not self._counters[counter] & self._log_mask:
+                    logger.info(f"Successfully routed to {destination}", 
+                               routing_id=routing_id, destination=destination)
         
-        # Log overall routing results
-        successful_destinations = [d for d, r in results.items() if r['status'] == 'success']
+        # Log overall routing results for failures and a sample of successes
+        self._completed += 1
         failed_destinations = [d for d, r in results.items() if r['status'] == 'error']
-        
-        logger.info("Routing completed", 
-                   routing_id=routing_id,
-                   successful=successful_destinations,
-                   failed=failed_destinations)
+        if failed_destinations or not self._completed & self._log_mask:
+            successful_destinations = [d for d, r in results.items() if r['status'] == 'success']
+            logger.info("Routing completed", 
+                       routing_id=routing_id,
+                       successful=successful_destinations,
+                       failed=failed_destinations)
     
-    def _generate_routing_id(self, data: Dict[str, Any]) -> str:
-        """Generate unique routing ID"""
-        timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S_%f")
-        data_hash = hash(str(data)) % 10000
-        return f"route_{timestamp}_{data_hash:04d}"
+    async def _log_ticker(self):
+        """Periodically log aggregate routing counters in place of per-message logs"""
+        interval = config.stats_log_interval
+        previous = self._counters[StatCounter.TOTAL_PROCESSED]
+        while True:
+            await asyncio.sleep(interval)
+            total = self._counters[StatCounter.TOTAL_PROCESSED]
+            logger.info("Routing stats",
+                       rate_per_sec=round((total - previous) / interval, 1),
+                       queued=len(self._processing_queue),
+                       **{counter.name.lower(): self._counters[counter] for counter in StatCounter})
+            previous = total
+    
+    def _generate_routing_id(self, payload: bytes) -> str:
+        """Generate unique routing ID from the current time and a stable hash of the canonical payload"""
+        data_hash = xxhash.xxh3_64_intdigest(payload) & 0xFFFF
+        return f"route_{time.time_ns()}_{data_hash:04x}"
     
     async def get_status(self) -> Dict[str, Any]:
         """Get router status and statistics"""
-        queue_size = self._processing_queue.qsize()
-        uptime = datetime.utcnow() - self.stats['started_at']
+        queue_size = len(self._processing_queue)
+        uptime_seconds = (time.monotonic_ns() - self._started_ns) // 1_000_000_000
         
-        # Get ChromaDB health
-        chromadb_health = await vector_store.health_check()
+        # Backend health is the expensive part; counters above and below are always live
+        health = await self._get_backend_health()
         
         return {
             'status': 'healthy',
-            'uptime_seconds': int(uptime.total_seconds()),
+            'uptime_seconds': uptime_seconds,
             'queue_size': queue_size,
-            'processing_active': self._processing_task is not None and not self._processing_task.done(),
-            'statistics': self.stats.copy(),
-            'processors': {
-                name: await processor.health_check() 
-                for name, processor in self.processors.items()
-            },
-            'chromadb_health': chromadb_health
+            'processing_active': self.processing_active,
+            'statistics': self.stats,
+            'processors': health['processors'],
+            'chromadb_health': health['chromadb_health']
         }
     
+    async def _get_backend_health(self) -> Dict[str, Any]:
+        """Processor and ChromaDB health, refreshed at most once per STATUS_CACHE_TTL"""
+        ttl_ns = int(config.status_cache_ttl * 1_000_000_000)
+        if self._health_cache and time.monotonic_ns() - self._health_ts_ns < ttl_ns:
+            return self._health_cache
+        
+        async with self._health_lock:
+            # Another request may have refreshed the snapshot while we waited
+            if self._health_cache and time.monotonic_ns() - self._health_ts_ns < ttl_ns:
+                return self._health_cache
+            
+            self._health_cache = {
+                'processors': {
+                    name: await processor.health_check() 
+                    for name, processor in self.processors.items()
+                },
+                'chromadb_health': await vector_store.health_check()
+            }
+            self._health_ts_ns = time.monotonic_ns()
+            return self._health_cache
+    
     async def shutdown(self):
         """Clean shutdown of the router"""
         logger.info("Shutting down MCP Router...")
         
-        # Stop processing task
-        if self._processing_task:
-            self._processing_task.cancel()
-            try:
-                await self._processing_task
-            except asyncio.CancelledError:
-                pass
+        # Wait for queue to empty while the workers are still running
+        if self._processing_tasks:
+            await self._processing_queue.join()
+        
+        # Stop processing workers
+        for task in self._processing_tasks:
+            task.cancel()
+        await asyncio.gather(*self._processing_tasks, return_exceptions=True)
+        self._processing_tasks = []
         
-        # Wait for queue to empty
-        await self._processing_queue.join()
+        if self._log_task is not None:
+            self._log_task.cancel()
+            await asyncio.gather(self._log_task, return_exceptions=True)
+            self._log_task = None
         
         # Shutdown processors
         for name, processor in self.processors.items():
@@ -273,6 +532,7 @@ router = MCPRouter()
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    configure_logging()
     await router.initialize()
     yield
     # Shutdown
@@ -283,7 +543,8 @@ app = FastAPI(
     title="MCP Router - Intelligent Data Distribution",
     description="Central intelligence hub for routing experiment data to appropriate stores",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 app.add_middleware(
@@ -297,8 +558,16 @@ app.add_middleware(
 
 # API Endpoints
 @app.post("/route")
-async def route_data(data: Dict[str, Any], background_tasks: BackgroundTasks):
+async def route_data(request: Request):
     """Route data through the MCP system"""
+    # The payload is forwarded as-is, so skip request-model validation and parse the raw body
+    try:
+        data = orjson.loads(await request.body())
+    except orjson.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON body: {e}")
+    if not isinstance(data, dict):
+        raise HTTPException(status_code=422, detail="Request body must be a JSON object")
+    
     try:
         result = await router.route_data(data, source="api")
         return result
@@ -314,16 +583,14 @@ async def get_status():
 
 @app.get("/health")
 async def health_check():
-    """Simple health check endpoint"""
-    status = await router.get_status()
-    return {"status": "healthy", "timestamp": datetime.utcnow().isoformat()}
+    """Simple health check endpoint (no backend calls; use /status for those)"""
+    return {"status": "healthy" if router.processing_active else "degraded", "timestamp": _now_iso()}
 
 
 @app.get("/stats")
 async def get_statistics():
     """Get detailed routing statistics"""
-    status = await router.get_status()
-    return status["statistics"]
+    return router.stats
 
 
 if __name__ == "__main__":
@@ -332,5 +599,8 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=config.mcp_port,
         log_level=config.log_level.lower(),
-        reload=False
+        reload=False,
+        loop="uvloop",
+        http="httptools",
+        workers=config.mcp_workers
     )
@@ -11,27 +11,134 @@ Each processor optimizes data format and storage patterns for its target system.
 """
 
 import asyncio
-import json
-from typing import Dict, Any, Optional, List
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime
-import traceback
 from abc import ABC, abstractmethod
 
 import asyncpg
 import clickhouse_connect
+from clickhouse_connect.driver.httputil import get_pool_manager
+import orjson
 import redis.asyncio as redis
+from uuid6 import uuid7
 from structlog import get_logger
 
 from ..core.config import config
 from ..core.chromadb_manager import vector_store
 from .redis_processor import RedisProcessor
+from .routing_engine import RoutingTask
 
 
 logger = get_logger(__name__)
 
+# PostgreSQL statements; asyncpg prepares each once per connection and reuses it from the statement cache
+SQL_UPSERT_EXPERIMENT = """
+    INSERT INTO experiments (
+        experiment_id, name, hypothesis, type, status, 
+        created_at, updated_at, configuration, mcp_metadata
+    ) VALUES (
+        $1, $2, $3, $4, $5, $6, $7, $8, $9
+    ) ON CONFLICT (experiment_id) 
+    DO UPDATE SET
+        updated_at = $7,
+        configuration = $8,
+        mcp_metadata = $9
+    RETURNING id, experiment_id
+"""
+
+SQL_UPSERT_ASSIGNMENT = """
+    INSERT INTO assignments (
+        assignment_id, user_id, experiment_id, variant_id,
+        assigned_at, mcp_metadata
+    ) VALUES ($1, $2, $3, $4, $5, $6)
+    ON CONFLICT (assignment_id)
+    DO UPDATE SET mcp_metadata = $6
+    RETURNING id, assignment_id
+"""
+
+SQL_UPSERT_USER = """
+    INSERT INTO users (
+        user_id, profile_data, preferences, segment,
+        created_at, updated_at, mcp_metadata
+    ) VALUES ($1, $2, $3, $4, $5, $6, $7)
+    ON CONFLICT (user_id)
+    DO UPDATE SET
+        profile_data = $2,
+        preferences = $3,
+        segment = $4,
+        updated_at = $6,
+        mcp_metadata = $7
+    RETURNING id, user_id
+"""
+
+SQL_CREATE_GENERIC_TABLE = """
+    CREATE TABLE IF NOT EXISTS mcp_data (
+        id SERIAL PRIMARY KEY,
+        data_type VARCHAR(50),
+        data_payload JSONB,
+        routing_metadata JSONB,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+# mcp_data is append-only, so a BRIN index keeps time-range scans cheap without B-tree write costs
+SQL_CREATE_GENERIC_INDEX = """
+    CREATE INDEX IF NOT EXISTS mcp_data_created_at_brin ON mcp_data USING BRIN (created_at)
+"""
+
+SQL_INSERT_GENERIC = """
+    INSERT INTO mcp_data (data_type, data_payload, routing_metadata)
+    VALUES ($1, $2, $3)
+    RETURNING id
+"""
+
+
+def _to_json(value: Any) -> str:
+    """Serialize a value to a JSON string for JSONB/String columns"""
+    return orjson.dumps(value, default=str).decode()
+
+
+def _json_preview(value: Any, limit: int) -> str:
+    """First `limit` bytes of a value's JSON, decoding only that slice rather than the whole document"""
+    return orjson.dumps(value, default=str)[:limit].decode(errors='ignore')
+
+
+def _extend_json(payload: bytes, extra: Dict[str, Any]) -> str:
+    """JSON for {**original, **extra}, spliced onto the original object's serialized bytes instead of re-encoding it"""
+    tail = orjson.dumps(extra, default=str)
+    if payload == b'{}':
+        return tail.decode()
+    # JSONB keeps the last of duplicate keys, matching the dict merge
+    return (payload[:-1] + b',' + tail[1:]).decode()
+
+
+def _parse_timestamp(value: Any, now: datetime) -> datetime:
+    """Coerce an ISO timestamp string into a datetime, falling back to now when missing or unparseable"""
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            pass
+    return now
+
 
 class BaseProcessor(ABC):
-    """Base class for all data processors"""
+    """
+    Base class for all data processors
+    
+    process_data runs concurrently for every in-flight routing task, so processors
+    should use a native async driver (is_async) with a pool of at least
+    config.processor_pool_limit connections, and acquire a connection from that
+    pool inside each call rather than holding one per task.
+    """
+    
+    # Whether the driver is natively async rather than a sync client run in threads
+    is_async = True
     
     def __init__(self, name: str):
         self.name = name
@@ -50,7 +157,7 @@ class BaseProcessor(ABC):
         pass
     
     @abstractmethod
-    async def process_data(self, data: Dict[str, Any], routing_task: Dict[str, Any]) -> Dict[str, Any]:
+    async def process_data(self, data: Dict[str, Any], routing_task: RoutingTask) -> Dict[str, Any]:
         """Process and store data"""
         pass
     
@@ -69,51 +176,41 @@ class BaseProcessor(ABC):
         
         logger.info(f"{self.name} processor shutdown complete")
     
-    def _update_stats(self, success: bool, error: Optional[str] = None):
+    @property
+    def pool_size(self) -> Optional[int]:
+        """Maximum concurrent connections, or None when the driver does not pool"""
+        return None
+    
+    def _update_stats(self, success: bool, error: Optional[str] = None, processed_at: Optional[str] = None):
         """Update processor statistics"""
         if success:
             self.stats['processed_count'] += 1
-            self.stats['last_processed'] = datetime.utcnow().isoformat()
+            self.stats['last_processed'] = processed_at or datetime.utcnow().isoformat()
         else:
             self.stats['error_count'] += 1
             self.stats['last_error'] = error
     
-    def _transform_for_storage(self, data: Dict[str, Any], routing_task: Dict[str, Any]) -> Dict[str, Any]:
-        """Base transformation for storage - can be overridden"""
+    def _routing_metadata(self, routing_task: RoutingTask, now: datetime) -> Dict[str, Any]:
+        """Small routing metadata dict stored alongside the payload"""
         return {
-            **data,
-            'mcp_routing_id': routing_task.get('routing_id'),
-            'mcp_processed_at': datetime.utcnow().isoformat(),
-            'mcp_classification': routing_task.get('classification', {}),
-            'mcp_source': routing_task.get('source', 'unknown')
+            'routing_id': routing_task.routing_id,
+            'processed_at': now.isoformat(),
+            'classification': routing_task.classification
         }
     
-    def _generate_cache_key(self, data: Dict[str, Any], data_type: str, routing_task: Dict[str, Any]) -> str:
-        """Generate cache key for cache-aside pattern"""
-        routing_id = routing_task.get('routing_id', 'unknown')
-        
-        if data_type == 'experiment':
-            experiment_id = data.get('experiment_id', 'unknown')
-            return f"{self.name.lower()}:experiment:{experiment_id}"
-            
-        elif data_type == 'assignment':
-            experiment_id = data.get('experiment_id', 'unknown')
-            user_id = data.get('user_id', 'unknown')
-            return f"{self.name.lower()}:assignment:{experiment_id}:{user_id}"
-            
-        elif data_type == 'user_data':
-            user_id = data.get('user_id', 'unknown')
-            return f"{self.name.lower()}:user:{user_id}:profile"
-            
-        elif data_type == 'event':
-            experiment_id = data.get('experiment_id', 'unknown')
-            variant_id = data.get('variant_id', 'unknown')
-            event_type = data.get('event_type', 'unknown')
-            hour = datetime.utcnow().strftime("%Y%m%d%H")
-            return f"{self.name.lower()}:metrics:{experiment_id}:{variant_id}:{event_type}:{hour}"
-            
-        else:
-            return f"{self.name.lower()}:{data_type}:{routing_id}"
+    def _storage_fields(self, routing_task: RoutingTask, processed_at: str) -> Dict[str, Any]:
+        """Routing fields merged into a stored document"""
+        return {
+            'mcp_routing_id': routing_task.routing_id,
+            'mcp_processed_at': processed_at,
+            'mcp_classification': routing_task.classification,
+            'mcp_source': routing_task.source
+        }
+    
+    def _transform_for_storage(self, data: Dict[str, Any], routing_task: RoutingTask,
+                               processed_at: str) -> Dict[str, Any]:
+        """Base transformation for storage - can be overridden"""
+        return {**data, **self._storage_fields(routing_task, processed_at)}
 
 
 class PostgreSQLProcessor(BaseProcessor):
@@ -127,20 +224,48 @@ class PostgreSQLProcessor(BaseProcessor):
     - Operational metadata
     """
     
+    # Columns written by the batched event COPY, in record order
+    EVENT_COLUMNS = ('event_id', 'user_id', 'event_type', 'properties', 'timestamp', 'mcp_metadata')
+    
     def __init__(self):
         super().__init__("PostgreSQL")
         self.connection_pool = None
+        self._event_queue: Optional[asyncio.Queue] = None
+        self._event_flush_task: Optional[asyncio.Task] = None
+        self._last_hc: Optional[Dict[str, Any]] = None
+        self._last_hc_ts = 0.0
+        # data_type -> table writer; other types go to the generic mcp_data table
+        self._handlers = {
+            'experiment': self._store_experiment_data,
+            'assignment': self._store_assignment_data,
+            'user_data': self._store_user_data,
+            'event': self._store_event_data,
+        }
     
     async def initialize(self):
         """Initialize PostgreSQL connection pool"""
         try:
             self.connection_pool = await asyncpg.create_pool(
                 config.database_url,
-                min_size=2,
-                max_size=10,
-                command_timeout=30
+                min_size=config.pg_pool_min_size,
+                max_size=config.pg_pool_max_size,
+                max_queries=50000,
+                max_inactive_connection_lifetime=300,
+                command_timeout=30,
+                statement_cache_size=1024,
+                # JIT compilation only slows down short OLTP statements
+                server_settings={'jit': 'off', 'application_name': 'mcp_router'}
             )
             
+            # The generic table only needs creating once, not on every generic insert
+            async with self.connection_pool.acquire() as conn:
+                await conn.execute(SQL_CREATE_GENERIC_TABLE)
+                await conn.execute(SQL_CREATE_GENERIC_INDEX)
+            
+            # Events are the high-volume path: batch them into COPYs instead of one INSERT each
+            self._event_queue = asyncio.Queue(maxsize=config.postgres_write_queue_size)
+            self._event_flush_task = asyncio.create_task(self._event_flusher())
+            
             self.initialized = True
             logger.info("PostgreSQL processor initialized", database_url=config.database_url.split('@')[1])
             
@@ -148,33 +273,103 @@ class PostgreSQLProcessor(BaseProcessor):
             logger.error("Failed to initialize PostgreSQL processor", error=str(e))
             raise
     
-    async def process_data(self, data: Dict[str, Any], routing_task: Dict[str, Any]) -> Dict[str, Any]:
+    @property
+    def pool_size(self) -> Optional[int]:
+        """Maximum connections in the asyncpg pool"""
+        return self.connection_pool.get_max_size() if self.connection_pool else None
+    
+    async def shutdown(self):
+        """Flush queued events, then close the connection pool"""
+        if self._event_queue is not None:
+            await self._event_queue.join()
+        if self._event_flush_task is not None:
+            self._event_flush_task.cancel()
+            await asyncio.gather(self._event_flush_task, return_exceptions=True)
+            self._event_flush_task = None
+        
+        if self.connection_pool:
+            try:
+                await self.connection_pool.close()
+            except Exception as e:
+                logger.warning(f"Error closing {self.name} connection pool", error=str(e))
+        
+        logger.info(f"{self.name} processor shutdown complete")
+    
+    async def _event_flusher(self):
+        """Drain the event queue into batched COPYs"""
+        queue = self._event_queue
+        
+        while True:
+            # Block for the first event, then fill the batch until full or the flush interval elapses
+            batch = [await queue.get()]
+            deadline = asyncio.get_running_loop().time() + config.postgres_flush_interval
+            
+            while len(batch) < config.postgres_batch_size:
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout=timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            try:
+                await self._flush_events(batch)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+    
+    async def _flush_events(self, batch: List[Tuple[tuple, asyncio.Future]]):
+        """COPY one batch of event records and resolve the waiting callers"""
+        records = [record for record, _ in batch]
+        
+        try:
+            async with self.connection_pool.acquire() as conn:
+                await conn.copy_records_to_table('events', records=records, columns=self.EVENT_COLUMNS)
+        except Exception as e:
+            logger.error("Failed to flush PostgreSQL event batch", rows=len(records), error=str(e))
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for _, future in batch:
+            if not future.done():
+                future.set_result(None)
+        
+        logger.debug("Flushed PostgreSQL event batch", rows=len(records))
+    
+    async def process_data(self, data: Dict[str, Any], routing_task: RoutingTask) -> Dict[str, Any]:
         """Process data for PostgreSQL storage"""
         try:
-            classification = routing_task.get('classification', {})
+            classification = routing_task.classification
             data_type = classification.get('data_type')
             
-            # Transform data for storage
-            transformed_data = self._transform_for_storage(data, routing_task)
+            # One clock read per call, so every derived timestamp agrees
+            now = datetime.utcnow()
+            
+            # Routing metadata travels next to the payload instead of in a merged copy of it
+            mcp_metadata = self._routing_metadata(routing_task, now)
             
             # Route to appropriate table/handler based on data type
-            if data_type == 'experiment':
-                result = await self._store_experiment_data(transformed_data)
-            elif data_type == 'assignment':
-                result = await self._store_assignment_data(transformed_data)
-            elif data_type == 'user_data':
-                result = await self._store_user_data(transformed_data)
-            elif data_type == 'event':
-                result = await self._store_event_data(transformed_data)
+            handler = self._handlers.get(data_type)
+            if handler is not None:
+                result = await handler(data, mcp_metadata, now)
             else:
-                # Generic storage for unknown types
-                result = await self._store_generic_data(transformed_data, data_type)
+                # Generic storage keeps the whole merged document as its payload; extending the
+                # router's serialized bytes avoids re-encoding a possibly large document on the loop
+                processed_at = mcp_metadata['processed_at']
+                if routing_task.payload is not None:
+                    document = _extend_json(routing_task.payload, self._storage_fields(routing_task, processed_at))
+                else:
+                    document = _to_json(self._transform_for_storage(data, routing_task, processed_at))
+                result = await self._store_generic_data(document, data_type, mcp_metadata)
             
-            self._update_stats(True)
+            self._update_stats(True, processed_at=mcp_metadata['processed_at'])
             
             logger.info("PostgreSQL processing completed", 
                        data_type=data_type,
-                       routing_id=routing_task.get('routing_id'),
+                       routing_id=routing_task.routing_id,
                        result_id=result.get('id'))
             
             return result
@@ -183,180 +378,93 @@ class PostgreSQLProcessor(BaseProcessor):
             error_msg = f"PostgreSQL processing failed: {str(e)}"
             self._update_stats(False, error_msg)
             logger.error("PostgreSQL processing failed", 
-                        error=str(e),
-                        routing_id=routing_task.get('routing_id'),
-                        traceback=traceback.format_exc())
+                        routing_id=routing_task.routing_id,
+                        exc_info=True)
             raise
     
-    async def _store_experiment_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
+    async def _store_experiment_data(self, data: Dict[str, Any], mcp_metadata: Dict[str, Any],
+                                     now: datetime) -> Dict[str, Any]:
         """Store experiment data in experiments table"""
         async with self.connection_pool.acquire() as conn:
-            # Upsert experiment record
-            query = """
-                INSERT INTO experiments (
-                    experiment_id, name, hypothesis, type, status, 
-                    created_at, updated_at, configuration, mcp_metadata
-                ) VALUES (
-                    $1, $2, $3, $4, $5, $6, $7, $8, $9
-                ) ON CONFLICT (experiment_id) 
-                DO UPDATE SET
-                    updated_at = $7,
-                    configuration = $8,
-                    mcp_metadata = $9
-                RETURNING id, experiment_id
-            """
-            
-            mcp_metadata = {
-                'routing_id': data.get('mcp_routing_id'),
-                'processed_at': data.get('mcp_processed_at'),
-                'classification': data.get('mcp_classification')
-            }
-            
             result = await conn.fetchrow(
-                query,
+                SQL_UPSERT_EXPERIMENT,
                 data.get('experiment_id'),
                 data.get('name'),
                 data.get('hypothesis'),
                 data.get('type', 'unknown'),
                 data.get('status', 'draft'),
-                data.get('created_at', datetime.utcnow()),
-                datetime.utcnow(),
-                json.dumps(data.get('configuration', {})),
-                json.dumps(mcp_metadata)
+                data.get('created_at', now),
+                now,
+                _to_json(data.get('configuration', {})),
+                _to_json(mcp_metadata)
             )
             
             return {'id': result['id'], 'experiment_id': result['experiment_id']}
     
-    async def _store_assignment_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
+    async def _store_assignment_data(self, data: Dict[str, Any], mcp_metadata: Dict[str, Any],
+                                     now: datetime) -> Dict[str, Any]:
         """Store assignment data in assignments table"""
         async with self.connection_pool.acquire() as conn:
-            query = """
-                INSERT INTO assignments (
-                    assignment_id, user_id, experiment_id, variant_id,
-                    assigned_at, mcp_metadata
-                ) VALUES ($1, $2, $3, $4, $5, $6)
-                ON CONFLICT (assignment_id)
-                DO UPDATE SET mcp_metadata = $6
-                RETURNING id, assignment_id
-            """
-            
-            mcp_metadata = {
-                'routing_id': data.get('mcp_routing_id'),
-                'processed_at': data.get('mcp_processed_at'),
-                'classification': data.get('mcp_classification')
-            }
-            
             result = await conn.fetchrow(
-                query,
+                SQL_UPSERT_ASSIGNMENT,
                 data.get('assignment_id'),
                 data.get('user_id'),
                 data.get('experiment_id'),
                 data.get('variant_id'),
-                data.get('assigned_at', datetime.utcnow()),
-                json.dumps(mcp_metadata)
+                data.get('assigned_at', now),
+                _to_json(mcp_metadata)
             )
             
             return {'id': result['id'], 'assignment_id': result['assignment_id']}
     
-    async def _store_user_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
+    async def _store_user_data(self, data: Dict[str, Any], mcp_metadata: Dict[str, Any],
+                               now: datetime) -> Dict[str, Any]:
         """Store user data in users table"""
         async with self.connection_pool.acquire() as conn:
-            query = """
-                INSERT INTO users (
-                    user_id, profile_data, preferences, segment,
-                    created_at, updated_at, mcp_metadata
-                ) VALUES ($1, $2, $3, $4, $5, $6, $7)
-                ON CONFLICT (user_id)
-                DO UPDATE SET
-                    profile_data = $2,
-                    preferences = $3,
-                    segment = $4,
-                    updated_at = $6,
-                    mcp_metadata = $7
-                RETURNING id, user_id
-            """
-            
-            mcp_metadata = {
-                'routing_id': data.get('mcp_routing_id'),
-                'processed_at': data.get('mcp_processed_at'),
-                'classification': data.get('mcp_classification')
-            }
-            
             result = await conn.fetchrow(
-                query,
+                SQL_UPSERT_USER,
                 data.get('user_id'),
-                json.dumps(data.get('profile_data', {})),
-                json.dumps(data.get('preferences', {})),
+                _to_json(data.get('profile_data', {})),
+                _to_json(data.get('preferences', {})),
                 data.get('segment', 'unknown'),
-                data.get('created_at', datetime.utcnow()),
-                datetime.utcnow(),
-                json.dumps(mcp_metadata)
+                data.get('created_at', now),
+                now,
+                _to_json(mcp_metadata)
             )
             
             return {'id': result['id'], 'user_id': result['user_id']}
     
-    async def _store_event_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Store event data in events table"""
-        async with self.connection_pool.acquire() as conn:
-            query = """
-                INSERT INTO events (
-                    event_id, user_id, event_type, properties,
-                    timestamp, mcp_metadata
-                ) VALUES ($1, $2, $3, $4, $5, $6)
-                RETURNING id, event_id
-            """
-            
-            mcp_metadata = {
-                'routing_id': data.get('mcp_routing_id'),
-                'processed_at': data.get('mcp_processed_at'),
-                'classification': data.get('mcp_classification')
-            }
-            
-            result = await conn.fetchrow(
-                query,
-                data.get('event_id', f"event_{datetime.utcnow().isoformat()}"),
-                data.get('user_id'),
-                data.get('event_type'),
-                json.dumps(data.get('properties', {})),
-                data.get('timestamp', datetime.utcnow()),
-                json.dumps(mcp_metadata)
-            )
-            
-            return {'id': result['id'], 'event_id': result['event_id']}
+    async def _store_event_data(self, data: Dict[str, Any], mcp_metadata: Dict[str, Any],
+                                now: datetime) -> Dict[str, Any]:
+        """Queue event data for the batched COPY into the events table and wait until it is stored"""
+        # Time-ordered UUIDv7 fallback: unique under concurrency and index-friendly
+        event_id = data.get('event_id') or str(uuid7())
+        record = (
+            event_id,
+            data.get('user_id'),
+            data.get('event_type'),
+            _to_json(data.get('properties', {})),
+            _parse_timestamp(data.get('timestamp'), now),
+            _to_json(mcp_metadata)
+        )
+        
+        future = asyncio.get_running_loop().create_future()
+        await self._event_queue.put((record, future))
+        await future
+        
+        return {'event_id': event_id}
     
-    async def _store_generic_data(self, data: Dict[str, Any], data_type: str) -> Dict[str, Any]:
-        """Store generic data in mcp_data table"""
+    async def _store_generic_data(self, document: str, data_type: str,
+                                  mcp_metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Store a serialized generic document in mcp_data table"""
+        # Encode before taking a pooled connection
+        routing_metadata = _to_json(mcp_metadata)
         async with self.connection_pool.acquire() as conn:
-            # Create generic storage table if needed
-            create_table_query = """
-                CREATE TABLE IF NOT EXISTS mcp_data (
-                    id SERIAL PRIMARY KEY,
-                    data_type VARCHAR(50),
-                    data_payload JSONB,
-                    routing_metadata JSONB,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """
-            await conn.execute(create_table_query)
-            
-            # Insert data
-            query = """
-                INSERT INTO mcp_data (data_type, data_payload, routing_metadata)
-                VALUES ($1, $2, $3)
-                RETURNING id
-            """
-            
-            routing_metadata = {
-                'routing_id': data.get('mcp_routing_id'),
-                'processed_at': data.get('mcp_processed_at'),
-                'classification': data.get('mcp_classification')
-            }
-            
             result = await conn.fetchrow(
-                query,
+                SQL_INSERT_GENERIC,
                 data_type,
-                json.dumps(data),
-                json.dumps(routing_metadata)
+                document,
+                routing_metadata
             )
             
             return {'id': result['id'], 'data_type': data_type}
@@ -367,15 +475,22 @@ class PostgreSQLProcessor(BaseProcessor):
             if not self.connection_pool:
                 return {'status': 'unhealthy', 'error': 'No connection pool'}
             
+            # Rapid scrapes reuse the last probe instead of taking a connection each time
+            if self._last_hc and time.monotonic() - self._last_hc_ts < config.status_cache_ttl:
+                return self._last_hc
+            
             async with self.connection_pool.acquire() as conn:
                 await conn.fetchval('SELECT 1')
             
-            return {
+            self._last_hc = {
                 'status': 'healthy',
                 'initialized': self.initialized,
                 'stats': self.stats.copy(),
-                'pool_size': len(self.connection_pool._holders)
+                'pool_size': self.connection_pool.get_size(),
+                'pool_idle': self.connection_pool.get_idle_size()
             }
+            self._last_hc_ts = time.monotonic()
+            return self._last_hc
             
         except Exception as e:
             return {
@@ -385,6 +500,22 @@ class PostgreSQLProcessor(BaseProcessor):
             }
 
 
+@lru_cache(maxsize=1)
+def _get_clickhouse_client():
+    """Process-wide ClickHouse client, so every caller shares one keep-alive HTTP pool"""
+    return clickhouse_connect.get_client(
+        host=config.clickhouse_host,
+        port=config.clickhouse_port,
+        database='experiments',
+        # Concurrent queries are not allowed within one session
+        autogenerate_session_id=False,
+        compress='lz4',
+        send_receive_timeout=10,
+        # Calls are serialized on the processor's executor thread, so a few sockets suffice
+        pool_mgr=get_pool_manager(maxsize=4, block=True)
+    )
+
+
 class ClickHouseProcessor(BaseProcessor):
     """
     ClickHouse processor for analytics data
@@ -396,27 +527,72 @@ class ClickHouseProcessor(BaseProcessor):
     - Historical data
     """
     
+    # clickhouse-connect is synchronous; its calls run on one dedicated thread
+    is_async = False
+    
+    # Tables written through the batch writer, with the (name, type) of each row field in order;
+    # declaring the types lets the driver skip a DESCRIBE and per-value type inference
+    BATCHED_TABLES = {
+        'mcp_events': (
+            ('event_id', 'String'),
+            ('user_id', 'String'),
+            ('experiment_id', 'String'),
+            ('event_type', 'String'),
+            ('timestamp', 'DateTime'),
+            ('properties', 'String'),
+            ('mcp_routing_id', 'String'),
+            ('mcp_processed_at', 'DateTime'),
+        ),
+        'mcp_analytics': (
+            ('metric_name', 'String'),
+            ('dimensions', 'String'),
+            ('value', 'Float64'),
+            ('timestamp', 'DateTime'),
+            ('mcp_routing_id', 'String'),
+        ),
+    }
+    
+    # Server-side async inserts merge whatever small batches still reach the server
+    INSERT_SETTINGS = {'async_insert': 1, 'wait_for_async_insert': 1}
+    
     def __init__(self):
         super().__init__("ClickHouse")
         self.client = None
+        # The client's HTTP session is not safe to share across threads, so every call goes through one
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='clickhouse')
+        self._write_queues: Dict[str, asyncio.Queue] = {}
+        self._flush_tasks: Dict[str, asyncio.Task] = {}
+        # Native-protocol connection for batched inserts, when configured; one insert at a time
+        self._native = None
+        self._native_lock = asyncio.Lock()
     
     async def initialize(self):
         """Initialize ClickHouse client"""
         try:
-            self.client = clickhouse_connect.get_client(
-                host=config.clickhouse_host,
-                port=config.clickhouse_port,
-                database='experiments'
-            )
+            # Building the client queries the server, so keep it off the event loop
+            self.client = await self._run(_get_clickhouse_client)
             
             # Test connection
-            await asyncio.get_event_loop().run_in_executor(
-                None, self.client.ping
-            )
+            await self._run(self.client.ping)
+            
+            if config.clickhouse_native_port:
+                # Requires the optional asynch install
+                import asynch
+                self._native = await asynch.connect(
+                    host=config.clickhouse_host,
+                    port=config.clickhouse_native_port,
+                    database='experiments',
+                    compression='lz4'
+                )
             
             # Ensure tables exist
             await self._ensure_tables()
             
+            # One batch writer per table, so each insert creates one MergeTree part for many rows
+            for table in self.BATCHED_TABLES:
+                self._write_queues[table] = asyncio.Queue(maxsize=config.clickhouse_write_queue_size)
+                self._flush_tasks[table] = asyncio.create_task(self._flusher(table))
+            
             self.initialized = True
             logger.info("ClickHouse processor initialized", 
                        host=config.clickhouse_host,
@@ -426,6 +602,98 @@ class ClickHouseProcessor(BaseProcessor):
             logger.error("Failed to initialize ClickHouse processor", error=str(e))
             raise
     
+    async def _run(self, func, *args, **kwargs):
+        """Run a blocking clickhouse-connect call on the processor's thread pool"""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, partial(func, *args, **kwargs))
+    
+    async def _insert(self, table: str, rows: List[List[Any]]):
+        """Queue rows for the table's batch writer and wait until they are inserted"""
+        future = asyncio.get_running_loop().create_future()
+        await self._write_queues[table].put((rows, future))
+        await future
+    
+    async def _flusher(self, table: str):
+        """Drain a table's write queue into batched inserts"""
+        queue = self._write_queues[table]
+        
+        while True:
+            # Block for the first rows, then fill the batch until full or the flush interval elapses
+            batch = [await queue.get()]
+            row_count = len(batch[0][0])
+            deadline = asyncio.get_running_loop().time() + config.clickhouse_flush_interval
+            
+            while row_count < config.clickhouse_batch_size:
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+                row_count += len(item[0])
+            
+            try:
+                await self._flush_batch(table, batch)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+    
+    async def _flush_batch(self, table: str, batch: List[Tuple[List[List[Any]], asyncio.Future]]):
+        """Insert one batch into ClickHouse and resolve the waiting callers"""
+        rows = [row for item_rows, _ in batch for row in item_rows]
+        column_names, column_types = zip(*self.BATCHED_TABLES[table])
+        
+        try:
+            if self._native is not None:
+                # Native TCP protocol: rows travel as compressed columnar blocks
+                async with self._native_lock:
+                    async with self._native.cursor() as cursor:
+                        await cursor.execute(f"INSERT INTO {table} ({', '.join(column_names)}) VALUES", rows)
+            else:
+                # Column-major input lets the native writer encode each column in one pass
+                await self._run(self.client.insert, table, list(zip(*rows)),
+                                column_names=column_names, column_type_names=column_types,
+                                column_oriented=True, settings=self.INSERT_SETTINGS)
+        except Exception as e:
+            logger.error("Failed to flush ClickHouse batch", table=table, rows=len(rows), error=str(e))
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for _, future in batch:
+            if not future.done():
+                future.set_result(None)
+        
+        logger.debug("Flushed ClickHouse batch", table=table, rows=len(rows))
+    
+    async def shutdown(self):
+        """Close the ClickHouse client and its thread pool"""
+        # Let queued rows reach ClickHouse before stopping the batch writers
+        for queue in self._write_queues.values():
+            await queue.join()
+        
+        for task in self._flush_tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._flush_tasks.values(), return_exceptions=True)
+        self._flush_tasks.clear()
+        
+        if self.client:
+            try:
+                self.client.close()
+            except Exception as e:
+                logger.warning(f"Error closing {self.name} connection", error=str(e))
+            _get_clickhouse_client.cache_clear()
+        if self._native is not None:
+            try:
+                await self._native.close()
+            except Exception as e:
+                logger.warning(f"Error closing {self.name} native connection", error=str(e))
+        self._executor.shutdown(wait=False)
+        
+        logger.info(f"{self.name} processor shutdown complete")
+    
     async def _ensure_tables(self):
         """Ensure required ClickHouse tables exist"""
         # Events table for time-series data
@@ -459,21 +727,20 @@ class ClickHouseProcessor(BaseProcessor):
             PARTITION BY toYYYYMM(date)
         """
         
-        await asyncio.get_event_loop().run_in_executor(
-            None, self.client.command, events_table
-        )
-        await asyncio.get_event_loop().run_in_executor(
-            None, self.client.command, analytics_table
-        )
+        await self._run(self.client.command, events_table)
+        await self._run(self.client.command, analytics_table)
     
-    async def process_data(self, data: Dict[str, Any], routing_task: Dict[str, Any]) -> Dict[str, Any]:
+    async def process_data(self, data: Dict[str, Any], routing_task: RoutingTask) -> Dict[str, Any]:
         """Process data for ClickHouse storage"""
         try:
-            classification = routing_task.get('classification', {})
+            classification = routing_task.classification
             data_type = classification.get('data_type')
             
+            # One clock read per call, so every derived timestamp agrees
+            now = datetime.utcnow()
+            
             # Transform data for ClickHouse
-            transformed_data = self._transform_for_clickhouse(data, routing_task)
+            transformed_data = self._transform_for_clickhouse(data, routing_task, now)
             
             # Route based on data type
             if data_type == 'event':
@@ -485,11 +752,11 @@ class ClickHouseProcessor(BaseProcessor):
                 transformed_data['event_type'] = data_type or 'unknown'
                 result = await self._store_event_data(transformed_data)
             
-            self._update_stats(True)
+            self._update_stats(True, processed_at=now.isoformat())
             
             logger.info("ClickHouse processing completed",
                        data_type=data_type,
-                       routing_id=routing_task.get('routing_id'))
+                       routing_id=routing_task.routing_id)
             
             return result
             
@@ -497,37 +764,43 @@ class ClickHouseProcessor(BaseProcessor):
             error_msg = f"ClickHouse processing failed: {str(e)}"
             self._update_stats(False, error_msg)
             logger.error("ClickHouse processing failed",
-                        error=str(e),
-                        routing_id=routing_task.get('routing_id'),
-                        traceback=traceback.format_exc())
+                        routing_id=routing_task.routing_id,
+                        exc_info=True)
             raise
     
-    def _transform_for_clickhouse(self, data: Dict[str, Any], routing_task: Dict[str, Any]) -> Dict[str, Any]:
+    def _transform_for_clickhouse(self, data: Dict[str, Any], routing_task: RoutingTask,
+                                  now: datetime) -> Dict[str, Any]:
         """Transform data for ClickHouse storage"""
         # Convert timestamp to ClickHouse format
-        timestamp = data.get('timestamp', datetime.utcnow())
+        timestamp = data.get('timestamp', now)
         if isinstance(timestamp, str):
             try:
                 timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
             except:
-                timestamp = datetime.utcnow()
+                timestamp = now
+        
+        # Store full data as properties, reusing the router's serialized payload when available
+        if 'properties' in data:
+            properties = _to_json(data['properties'])
+        elif routing_task.payload is not None:
+            properties = routing_task.payload.decode()
+        else:
+            properties = _to_json(data)
         
         return {
-            'event_id': data.get('event_id', f"ch_event_{datetime.utcnow().isoformat()}"),
+            'event_id': data.get('event_id') or str(uuid7()),
             'user_id': data.get('user_id', ''),
             'experiment_id': data.get('experiment_id', ''),
             'event_type': data.get('event_type', 'unknown'),
             'timestamp': timestamp,
-            'properties': json.dumps(data.get('properties', data)),  # Store full data as properties
-            'mcp_routing_id': routing_task.get('routing_id', ''),
-            'mcp_processed_at': datetime.utcnow()
+            'properties': properties,
+            'mcp_routing_id': routing_task.routing_id,
+            'mcp_processed_at': now
         }
     
     async def _store_event_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Store event data in ClickHouse events table"""
-        await asyncio.get_event_loop().run_in_executor(
-            None,
-            self.client.insert,
+        await self._insert(
             'mcp_events',
             [[
                 data['event_id'],
@@ -551,22 +824,19 @@ class ClickHouseProcessor(BaseProcessor):
             # Convert data to generic metric
             metrics = {'count': 1}
         
+        # Every metric row shares the same dimensions, so serialize them once
+        dimensions = _to_json(data.get('dimensions', {}))
         rows = []
         for metric_name, value in metrics.items():
             rows.append([
                 metric_name,
-                json.dumps(data.get('dimensions', {})),
+                dimensions,
                 float(value),
                 data['timestamp'],
                 data['mcp_routing_id']
             ])
         
-        await asyncio.get_event_loop().run_in_executor(
-            None,
-            self.client.insert,
-            'mcp_analytics',
-            rows
-        )
+        await self._insert('mcp_analytics', rows)
         
         return {'metrics_stored': len(metrics), 'stored_at': data['mcp_processed_at']}
     
@@ -577,9 +847,7 @@ class ClickHouseProcessor(BaseProcessor):
                 return {'status': 'unhealthy', 'error': 'No client connection'}
             
             # Test with a simple query
-            await asyncio.get_event_loop().run_in_executor(
-                None, self.client.query, 'SELECT 1'
-            )
+            await self._run(self.client.query, 'SELECT 1')
             
             return {
                 'status': 'healthy',
@@ -623,30 +891,33 @@ class ChromaDBProcessor(BaseProcessor):
             logger.error("Failed to initialize ChromaDB processor", error=str(e))
             raise
     
-    async def process_data(self, data: Dict[str, Any], routing_task: Dict[str, Any]) -> Dict[str, Any]:
+    async def process_data(self, data: Dict[str, Any], routing_task: RoutingTask) -> Dict[str, Any]:
         """Process data for ChromaDB storage"""
         try:
-            classification = routing_task.get('classification', {})
+            classification = routing_task.classification
             data_type = classification.get('data_type')
             
+            # One clock read per call, so every derived timestamp agrees
+            now_iso = datetime.utcnow().isoformat()
+            
             # Route based on data type
             if data_type == 'experiment':
                 result = await self._store_experiment_context(data)
             elif data_type == 'optimization':
                 result = await self._store_optimization_pattern(data)
             elif data_type == 'event' and classification.get('ai_enhanced'):
-                result = await self._store_enhanced_event(data)
+                result = await self._store_enhanced_event(data, now_iso)
             elif data_type == 'user_data' and 'journey' in data:
                 result = await self._store_user_journey(data)
             else:
                 # Generic storage in events collection
-                result = await self._store_generic_context(data, data_type)
+                result = await self._store_generic_context(data, data_type, now_iso)
             
-            self._update_stats(True)
+            self._update_stats(True, processed_at=now_iso)
             
             logger.info("ChromaDB processing completed",
                        data_type=data_type,
-                       routing_id=routing_task.get('routing_id'),
+                       routing_id=routing_task.routing_id,
                        doc_id=result.get('doc_id'))
             
             return result
@@ -655,9 +926,8 @@ class ChromaDBProcessor(BaseProcessor):
             error_msg = f"ChromaDB processing failed: {str(e)}"
             self._update_stats(False, error_msg)
             logger.error("ChromaDB processing failed",
-                        error=str(e),
-                        routing_id=routing_task.get('routing_id'),
-                        traceback=traceback.format_exc())
+                        routing_id=routing_task.routing_id,
+                        exc_info=True)
             raise
     
     async def _store_experiment_context(self, data: Dict[str, Any]) -> Dict[str, Any]:
@@ -675,73 +945,60 @@ class ChromaDBProcessor(BaseProcessor):
         doc_id = await vector_store.store_user_journey(data)
         return {'doc_id': doc_id, 'collection': 'user_journeys'}
     
-    async def _store_enhanced_event(self, data: Dict[str, Any]) -> Dict[str, Any]:
+    async def _store_enhanced_event(self, data: Dict[str, Any], now_iso: str) -> Dict[str, Any]:
         """Store AI-enhanced event in ChromaDB"""
-        # Transform event to context format
-        context_data = {
-            'event_id': data.get('event_id'),
-            'event_type': data.get('event_type'),
-            'user_context': data.get('user_context', {}),
-            'experiment_context': data.get('experiment_context', {}),
-            'semantic_features': data.get('semantic_features', {}),
-            'timestamp': data.get('timestamp', datetime.utcnow().isoformat())
-        }
+        # Read each field once; the description and the metadata share them
+        event_id = data.get('event_id')
+        event_type = data.get('event_type')
+        user_id = data.get('user_id')
+        experiment_id = data.get('experiment_id')
+        properties = data.get('properties')
         
         # Store in events collection
-        collection = vector_store.collections[config.events_collection]
-        doc_id = f"event_{data.get('event_id', '')}_{datetime.utcnow().isoformat()}"
+        doc_id = f"event_{'' if event_id is None else event_id}_{now_iso}"
         
-        # Generate description for embedding
+        # Generate description for embedding from the fields that are present
         description_parts = []
-        if event_type := data.get('event_type'):
+        if event_type:
             description_parts.append(f"Event: {event_type}")
-        if user_id := data.get('user_id'):
+        if user_id:
             description_parts.append(f"User: {user_id}")
-        if experiment_id := data.get('experiment_id'):
+        if experiment_id:
             description_parts.append(f"Experiment: {experiment_id}")
-        if properties := data.get('properties'):
-            description_parts.append(f"Context: {json.dumps(properties)[:200]}")
+        if properties:
+            description_parts.append(f"Context: {_json_preview(properties, 200)}")
         
         context_text = ". ".join(description_parts)
         
         # Metadata
         metadata = {
-            'event_id': data.get('event_id'),
-            'event_type': data.get('event_type'),
-            'user_id': data.get('user_id', ''),
-            'experiment_id': data.get('experiment_id', ''),
-            'timestamp': data.get('timestamp', datetime.utcnow().isoformat()),
+            'event_id': '' if event_id is None else event_id,
+            'event_type': '' if event_type is None else event_type,
+            'user_id': '' if user_id is None else user_id,
+            'experiment_id': '' if experiment_id is None else experiment_id,
+            'timestamp': data.get('timestamp', now_iso),
             'ai_enhanced': True
         }
         
-        collection.add(
-            documents=[context_text],
-            metadatas=[metadata],
-            ids=[doc_id]
-        )
+        await vector_store.store_document(config.events_collection, doc_id, context_text, metadata)
         
         return {'doc_id': doc_id, 'collection': 'events'}
     
-    async def _store_generic_context(self, data: Dict[str, Any], data_type: str) -> Dict[str, Any]:
+    async def _store_generic_context(self, data: Dict[str, Any], data_type: str, now_iso: str) -> Dict[str, Any]:
         """Store generic data context in ChromaDB"""
         # Use events collection as fallback
-        collection = vector_store.collections[config.events_collection]
-        doc_id = f"generic_{data_type}_{datetime.utcnow().isoformat()}"
+        doc_id = f"generic_{data_type}_{now_iso}"
         
         # Create basic description
-        context_text = f"Data type: {data_type}. Content: {json.dumps(data)[:500]}"
+        context_text = f"Data type: {data_type}. Content: {_json_preview(data, 500)}"
         
         metadata = {
             'data_type': data_type,
-            'timestamp': datetime.utcnow().isoformat(),
+            'timestamp': now_iso,
             'generic_storage': True
         }
         
-        collection.add(
-            documents=[context_text],
-            metadatas=[metadata],
-            ids=[doc_id]
-        )
+        await vector_store.store_document(config.events_collection, doc_id, context_text, metadata)
         
         return {'doc_id': doc_id, 'collection': 'events', 'type': 'generic'}
     
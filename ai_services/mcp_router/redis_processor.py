@@ -13,18 +13,86 @@ and reducing database load through intelligent caching strategies.
 """
 
 import asyncio
-import json
-from typing import Dict, Any, Optional, List
-from datetime import datetime
-import traceback
+import socket
+import time
+from functools import lru_cache
+from typing import Dict, Any, Optional, List, Set, Callable, Awaitable, Tuple
+from datetime import datetime, timedelta
+import uuid
 
+import orjson
 import redis.asyncio as redis
+import xxhash
+import zstandard
+from redis.asyncio.client import Pipeline
+from redis.exceptions import DataError, ResponseError
+from redis.utils import HIREDIS_AVAILABLE
 from structlog import get_logger
 
 from ..core.config import config
+from .routing_engine import RoutingTask
 
 logger = get_logger(__name__)
 
+# Probe idle pooled sockets so a silently dropped connection fails fast instead of stalling a write
+# (TCP_KEEPIDLE and friends are not available on every platform)
+_KEEPALIVE_OPTIONS = {
+    getattr(socket, name): value
+    for name, value in (('TCP_KEEPIDLE', 30), ('TCP_KEEPINTVL', 10), ('TCP_KEEPCNT', 3))
+    if hasattr(socket, name)
+}
+
+# Frame header of zstd-compressed cache values; JSON documents never start with it
+_ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+# Keys per SCAN page and per UNLINK in invalidate_cache
+_SCAN_COUNT = 1000
+_INVALIDATE_BATCH = 500
+
+
+# Time buckets in keys change once an hour/day, so each is formatted once instead of strftime per event
+@lru_cache(maxsize=64)
+def _hour_bucket(year: int, month: int, day: int, hour: int) -> str:
+    return f"{year:04d}{month:02d}{day:02d}{hour:02d}"
+
+
+@lru_cache(maxsize=64)
+def _day_bucket(year: int, month: int, day: int) -> str:
+    return f"{year:04d}{month:02d}{day:02d}"
+
+
+# data_type -> cache key built from the message and the processing time
+_CACHE_KEY_BUILDERS: Dict[str, Callable[[Dict[str, Any], datetime], str]] = {
+    'experiment': lambda data, now: f"experiment:{data.get('experiment_id', 'unknown')}",
+    'assignment': lambda data, now: (
+        f"assignment:{data.get('experiment_id', 'unknown')}:{data.get('user_id', 'unknown')}"),
+    'user_data': lambda data, now: f"user:{data.get('user_id', 'unknown')}:profile",
+    'event': lambda data, now: (
+        f"metrics:{data.get('experiment_id', 'unknown')}:{data.get('variant_id', 'unknown')}"
+        f":{data.get('event_type', 'unknown')}:{_hour_bucket(now.year, now.month, now.day, now.hour)}"),
+    'analytics': lambda data, now: (
+        f"analytics:{data.get('experiment_id', 'unknown')}:{_day_bucket(now.year, now.month, now.day)}"),
+}
+
+# Delete a lock only while it still holds our token, so an expired lock re-acquired by another caller survives
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+# Per-event metrics in one command: counter + TTL, detail document, daily unique-user HyperLogLog.
+# Atomic, so a counter can never be left without its expiry
+_EVENT_METRICS_SCRIPT = """
+local count = redis.call('incr', KEYS[1])
+redis.call('expire', KEYS[1], ARGV[1])
+redis.call('set', KEYS[2], ARGV[2], 'EX', ARGV[1])
+redis.call('pfadd', KEYS[3], ARGV[3])
+redis.call('expire', KEYS[3], ARGV[4])
+return count
+"""
+
 
 class RedisProcessor:
     """
@@ -38,10 +106,25 @@ class RedisProcessor:
     - Data deduplication
     """
     
+    # redis.asyncio is a native async driver
+    is_async = True
+    
     def __init__(self):
         self.name = "Redis"
         self.redis_client = None
         self.connection_pool = None
+        self._release_lock = None
+        self._write_queue: Optional[asyncio.Queue] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._bloom_key: Optional[str] = None  # today's dedup filter, once reserved
+        # Cache values above redis_compress_min_bytes are stored zstd-compressed
+        self._compressor = zstandard.ZstdCompressor(level=3)
+        self._decompressor = zstandard.ZstdDecompressor()
+        self._info_cache: Tuple[float, Optional[Dict[str, Any]]] = (0.0, None)  # (monotonic time, INFO)
+        # Set members added by the pipeline batch being built: key -> (members, ttl, futures of the adding messages)
+        self._batch_sets: Dict[str, Tuple[Set[str], int, List[asyncio.Future]]] = {}
+        # Set additions of the message being queued, merged into _batch_sets only once it queued cleanly
+        self._message_sets: List[Tuple[str, str, int]] = []
         self.initialized = False
         
         # Cache TTL strategies for different data types
@@ -71,66 +154,106 @@ class RedisProcessor:
             # Create Redis connection pool
             self.connection_pool = redis.ConnectionPool.from_url(
                 config.redis_url,
-                max_connections=10,
-                decode_responses=True
+                # The pool raises rather than waits when exhausted, so size it for every concurrent write
+                max_connections=max(config.redis_pool_size, config.processor_pool_limit),
+                # Values are orjson documents: hand the raw bytes to orjson.loads without a UTF-8 decode
+                decode_responses=False,
+                # redis-py already sets TCP_NODELAY on every connection
+                socket_keepalive=True,
+                socket_keepalive_options=_KEEPALIVE_OPTIONS,
+                socket_connect_timeout=config.redis_connect_timeout,
+                retry_on_timeout=True,
+                health_check_interval=30
             )
             
             self.redis_client = redis.Redis(connection_pool=self.connection_pool)
+            self._release_lock = self.redis_client.register_script(_RELEASE_LOCK_SCRIPT)
             
             # Test connection
             await self.redis_client.ping()
             
+            # Writes from concurrent messages are coalesced into shared pipelines
+            self._write_queue = asyncio.Queue(maxsize=config.redis_write_queue_size)
+            self._flush_task = asyncio.create_task(self._flusher())
+            
+            if not HIREDIS_AVAILABLE:
+                logger.warning("hiredis not installed - Redis replies are parsed in pure Python")
+            
             self.initialized = True
-            logger.info("Redis processor initialized", redis_url=config.redis_url)
+            logger.info("Redis processor initialized", redis_url=config.redis_url, hiredis=HIREDIS_AVAILABLE)
             
         except Exception as e:
             logger.error("Failed to initialize Redis processor", error=str(e))
             raise
     
-    async def process_data(self, data: Dict[str, Any], routing_task: Dict[str, Any]) -> Dict[str, Any]:
+    @property
+    def pool_size(self) -> Optional[int]:
+        """Maximum connections in the Redis pool"""
+        return self.connection_pool.max_connections if self.connection_pool else None
+    
+    async def process_data(self, data: Dict[str, Any], routing_task: RoutingTask) -> Dict[str, Any]:
         """Process data for Redis storage with cache-aside pattern"""
         try:
-            classification = routing_task.get('classification', {})
+            classification = routing_task.classification
             data_type = classification.get('data_type', 'unknown')
             
+            # One clock read per call, so every derived timestamp agrees
+            now = datetime.utcnow()
+            
             # Generate cache key based on data type and content
-            cache_key = self._generate_cache_key(data, data_type, routing_task)
+            cache_key = self._generate_cache_key(data, data_type, routing_task, now)
             
-            # Check if data already exists in cache (deduplication)
-            if await self._is_duplicate(cache_key, routing_task):
-                self.stats['cache_hits'] += 1
-                logger.info("Data already processed - cache hit", 
-                           cache_key=cache_key,
-                           routing_id=routing_task.get('routing_id'))
-                return {'status': 'cached', 'cache_key': cache_key}
+            # Deduplication: the flusher claims processed:{event_id} with SET NX for the whole batch
+            # in one round-trip before any writes; Bloom filters are checked here instead.
+            # Keyed by the producer's event ID, since every delivery gets a fresh routing ID
+            claim_key = None
+            event_id = data.get('event_id')
+            if event_id is not None:
+                if config.redis_dedup_bloom:
+                    if not await self._bloom_claim(str(event_id), now):
+                        return self._duplicate(cache_key, routing_task)
+                else:
+                    claim_key = f"processed:{event_id}"
             
             # Transform data for Redis storage
-            transformed_data = self._transform_for_redis(data, routing_task)
+            transformed_data = self._transform_for_redis(data, routing_task, now.isoformat())
+            # Encoded here rather than in the flusher, so a large document never stalls a whole batch.
+            # Only documents under keys no other service reads may be compressed: the experiment,
+            # assignment, user and analytics keys are shared with the API's cache and stay plain JSON
+            compress = data_type == 'event' or data_type not in _CACHE_KEY_BUILDERS
+            document = await self._encode_document(transformed_data, compress)
             
-            # Store data based on type
-            if data_type == 'experiment':
-                result = await self._store_experiment_cache(transformed_data, cache_key)
-            elif data_type == 'assignment':
-                result = await self._store_assignment_cache(transformed_data, cache_key)
-            elif data_type == 'user_data':
-                result = await self._store_user_cache(transformed_data, cache_key)
-            elif data_type == 'event':
-                result = await self._store_event_metrics(transformed_data, cache_key)
-            elif data_type == 'analytics':
-                result = await self._store_analytics_cache(transformed_data, cache_key)
-            else:
-                result = await self._store_generic_cache(transformed_data, cache_key, data_type)
+            # This message's writes ride a pipeline shared with other in-flight messages
+            def queue_writes(pipe: Pipeline) -> Dict[str, Any]:
+                if data_type == 'experiment':
+                    return self._store_experiment_cache(pipe, transformed_data, document, cache_key)
+                elif data_type == 'assignment':
+                    return self._store_assignment_cache(pipe, transformed_data, document, cache_key)
+                elif data_type == 'user_data':
+                    return self._store_user_cache(pipe, transformed_data, document, cache_key)
+                elif data_type == 'event':
+                    return self._store_event_metrics(pipe, transformed_data, document, cache_key, now)
+                elif data_type == 'analytics':
+                    return self._store_analytics_cache(pipe, transformed_data, document, cache_key)
+                return self._store_generic_cache(pipe, transformed_data, document, cache_key, data_type)
             
-            # Mark as processed for deduplication
-            await self._mark_processed(cache_key, routing_task)
+            written = await self._write(queue_writes, claim_key)
+            if written is None:
+                return self._duplicate(cache_key, routing_task)
+            result, replies = written
+            
+            if data_type == 'event':
+                # The metrics script returns the counter; a sharded one is only this shard's share
+                # of the total (get_event_count sums the shards)
+                result['shard_count' if config.redis_counter_shards > 1 else 'count'] = replies[0]
             
             self.stats['processed_count'] += 1
-            self.stats['last_processed'] = datetime.utcnow().isoformat()
+            self.stats['last_processed'] = transformed_data['cached_at']
             
             logger.info("Redis processing completed",
                        data_type=data_type,
                        cache_key=cache_key,
-                       routing_id=routing_task.get('routing_id'))
+                       routing_id=routing_task.routing_id)
             
             return result
             
@@ -139,97 +262,294 @@ class RedisProcessor:
             self.stats['error_count'] += 1
             self.stats['last_error'] = error_msg
             logger.error("Redis processing failed",
-                        error=str(e),
-                        routing_id=routing_task.get('routing_id'),
-                        traceback=traceback.format_exc())
+                        routing_id=routing_task.routing_id,
+                        exc_info=True)
             raise
     
-    def _generate_cache_key(self, data: Dict[str, Any], data_type: str, routing_task: Dict[str, Any]) -> str:
+    def _duplicate(self, cache_key: str, routing_task: RoutingTask) -> Dict[str, Any]:
+        """Result for a message whose event ID was already processed"""
+        self.stats['cache_hits'] += 1
+        logger.info("Data already processed - cache hit", 
+                   cache_key=cache_key,
+                   routing_id=routing_task.routing_id)
+        return {'status': 'cached', 'cache_key': cache_key}
+    
+    def _generate_cache_key(self, data: Dict[str, Any], data_type: str, routing_task: RoutingTask,
+                            now: datetime) -> str:
         """Generate cache key based on data type and content"""
-        routing_id = routing_task.get('routing_id', 'unknown')
+        build_key = _CACHE_KEY_BUILDERS.get(data_type)
+        if build_key is not None:
+            return build_key(data, now)
         
-        if data_type == 'experiment':
-            experiment_id = data.get('experiment_id', 'unknown')
-            return f"experiment:{experiment_id}"
-            
-        elif data_type == 'assignment':
-            experiment_id = data.get('experiment_id', 'unknown')
-            user_id = data.get('user_id', 'unknown')
-            return f"assignment:{experiment_id}:{user_id}"
-            
-        elif data_type == 'user_data':
-            user_id = data.get('user_id', 'unknown')
-            return f"user:{user_id}:profile"
-            
-        elif data_type == 'event':
-            experiment_id = data.get('experiment_id', 'unknown')
-            variant_id = data.get('variant_id', 'unknown')
-            event_type = data.get('event_type', 'unknown')
-            hour = datetime.utcnow().strftime("%Y%m%d%H")
-            return f"metrics:{experiment_id}:{variant_id}:{event_type}:{hour}"
-            
-        elif data_type == 'analytics':
-            experiment_id = data.get('experiment_id', 'unknown')
-            date = datetime.utcnow().strftime("%Y%m%d")
-            return f"analytics:{experiment_id}:{date}"
-            
-        else:
-            # Generic key for unknown types
-            return f"generic:{data_type}:{routing_id}"
+        # Generic key for unknown types
+        return f"generic:{data_type}:{routing_task.routing_id}"
     
-    def _transform_for_redis(self, data: Dict[str, Any], routing_task: Dict[str, Any]) -> Dict[str, Any]:
+    def _transform_for_redis(self, data: Dict[str, Any], routing_task: RoutingTask, now_iso: str) -> Dict[str, Any]:
         """Transform data for Redis storage"""
         return {
             **data,
-            'mcp_routing_id': routing_task.get('routing_id'),
-            'mcp_processed_at': datetime.utcnow().isoformat(),
-            'mcp_classification': routing_task.get('classification', {}),
-            'mcp_source': routing_task.get('source', 'unknown'),
-            'cached_at': datetime.utcnow().isoformat()
+            'mcp_routing_id': routing_task.routing_id,
+            'mcp_processed_at': now_iso,
+            'mcp_classification': routing_task.classification,
+            'mcp_source': routing_task.source,
+            'cached_at': now_iso
         }
     
-    async def _is_duplicate(self, cache_key: str, routing_task: Dict[str, Any]) -> bool:
-        """Check if data is already processed (deduplication)"""
-        routing_id = routing_task.get('routing_id')
-        if not routing_id:
-            return False
+    async def _write(self, queue_writes: Callable[[Pipeline], Dict[str, Any]],
+                     claim_key: Optional[str]) -> Optional[Tuple[Dict[str, Any], List[Any]]]:
+        """Hand a message's writes to the pipeline flusher and wait for its own replies (None for a duplicate)"""
+        future = asyncio.get_running_loop().create_future()
+        await self._write_queue.put((queue_writes, claim_key, future))
+        return await future
+    
+    async def _flusher(self):
+        """Drain the write queue into shared pipelines"""
+        queue = self._write_queue
+        
+        while True:
+            # Block for the first message, then fill the batch until full or the flush interval elapses
+            batch = [await queue.get()]
+            deadline = asyncio.get_running_loop().time() + config.redis_flush_interval
+            
+            while len(batch) < config.redis_batch_size:
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+            
+            try:
+                await self._flush_batch(batch)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+    
+    async def _flush_batch(self, batch: List[Tuple[Callable[[Pipeline], Dict[str, Any]], Optional[str], asyncio.Future]]):
+        """Claim, then write, a batch of messages in two pipelines and resolve each caller with its slice of replies"""
+        batch = await self._claim_batch(batch)
+        if not batch:
+            return
+        
+        try:
+            await self._write_batch(batch)
+        except (DataError, TypeError) as e:
+            # redis-py could not encode a command, so nothing reached the server:
+            # retry each message on its own so only the bad one fails
+            logger.warning("Redis pipeline rejected, retrying per message", messages=len(batch), error=str(e))
+            for item in batch:
+                if item[2].done():
+                    continue
+                try:
+                    await self._write_batch([item])
+                except Exception as message_error:
+                    _, claim_key, future = item
+                    if not future.done():
+                        future.set_exception(message_error)
+                    await self._release_claims([claim_key])
+        except Exception as e:
+            # Connection loss or timeout: part of the batch may already have run, and replaying it
+            # would double-apply the counters (and stall the flusher through an outage), so fail it once
+            logger.error("Failed to flush Redis pipeline", messages=len(batch), error=str(e))
+            failed_claims = []
+            for _, claim_key, future in batch:
+                if not future.done():
+                    failed_claims.append(claim_key)
+                    future.set_exception(e)
+            await self._release_claims(failed_claims)
+    
+    async def _write_batch(self, batch: List[Tuple[Callable[[Pipeline], Dict[str, Any]], Optional[str], asyncio.Future]]):
+        """Run claimed messages' writes in one pipeline; raises, leaving their futures pending, if it fails as a whole"""
+        pending = []
+        failed_claims = []
+        self._batch_sets = {}
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            for queue_writes, claim_key, future in batch:
+                if future.done():
+                    continue
+                start = len(pipe)
+                self._message_sets = []
+                try:
+                    result = queue_writes(pipe)
+                except Exception as e:
+                    # Nothing of a failed message may run: drop the commands it already queued
+                    # and its claim, or a retry would be treated as a duplicate for the marker's TTL
+                    del pipe.command_stack[start:]
+                    failed_claims.append(claim_key)
+                    if not future.done():
+                        future.set_exception(e)
+                    continue
+                for key, member, ttl in self._message_sets:
+                    entry = self._batch_sets.get(key)
+                    if entry is None:
+                        self._batch_sets[key] = ({member}, ttl, [future])
+                    else:
+                        entry[0].add(member)
+                        entry[2].append(future)
+                pending.append((future, claim_key, result, start, len(pipe)))
+            
+            self._message_sets = []
             
-        duplicate_key = f"processed:{routing_id}"
-        return await self.redis_client.exists(duplicate_key) > 0
-    
-    async def _mark_processed(self, cache_key: str, routing_task: Dict[str, Any]):
-        """Mark data as processed for deduplication"""
-        routing_id = routing_task.get('routing_id')
-        if routing_id:
-            duplicate_key = f"processed:{routing_id}"
-            ttl = self.cache_ttl_strategies['processed']
-            await self.redis_client.setex(duplicate_key, ttl, "true")
-    
-    async def _store_experiment_cache(self, data: Dict[str, Any], cache_key: str) -> Dict[str, Any]:
-        """Store experiment data in Redis cache"""
+            # One SADD + EXPIRE per lookup set, however many messages in the batch touched it
+            set_writes = []
+            for key, (members, ttl, futures) in self._batch_sets.items():
+                set_writes.append((key, futures, len(pipe)))
+                pipe.sadd(key, *members)
+                pipe.expire(key, ttl)
+            self._batch_sets = {}
+            
+            # Released now, since a whole-pipeline failure below skips these messages on retry
+            await self._release_claims(failed_claims)
+            failed_claims = []
+            if not pending:
+                return
+            # Per-command errors come back as replies, so one bad message does not fail the batch
+            replies = await pipe.execute(raise_on_error=False)
+        
+        # A failed set write (e.g. WRONGTYPE) fails every message that added to that set
+        set_errors: Dict[asyncio.Future, Exception] = {}
+        for key, futures, index in set_writes:
+            error = next((reply for reply in replies[index:index + 2] if isinstance(reply, Exception)), None)
+            if error is not None:
+                logger.error("Failed to update Redis lookup set", key=key, messages=len(futures), error=str(error))
+                for future in futures:
+                    set_errors.setdefault(future, error)
+        
+        for future, claim_key, result, start, end in pending:
+            own = replies[start:end]
+            error = next((reply for reply in own if isinstance(reply, Exception)), None)
+            if error is None:
+                error = set_errors.get(future)
+            if error is not None:
+                failed_claims.append(claim_key)
+                if not future.done():
+                    future.set_exception(error)
+            elif not future.done():
+                future.set_result((result, own))
+        await self._release_claims(failed_claims)
+    
+    async def _claim_batch(self, batch: List[Tuple[Callable[[Pipeline], Dict[str, Any]], Optional[str], asyncio.Future]]):
+        """SET NX every claim key of the batch in one pipeline; return the messages that won their claim"""
+        if not any(claim_key for _, claim_key, _ in batch):
+            return batch
+        
+        ttl = self.cache_ttl_strategies['processed']
+        try:
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for _, claim_key, _ in batch:
+                    if claim_key:
+                        # Only the key's existence matters, so the marker carries an empty value
+                        pipe.set(claim_key, b"", ex=ttl, nx=True)
+                replies = iter(await pipe.execute(raise_on_error=False))
+        except Exception as e:
+            logger.error("Failed to claim Redis batch", messages=len(batch), error=str(e))
+            for *_, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return []
+        
+        claimed = []
+        for item in batch:
+            _, claim_key, future = item
+            reply = next(replies) if claim_key else True
+            if isinstance(reply, Exception):
+                if not future.done():
+                    future.set_exception(reply)
+            elif not reply:
+                # Already processed, or claimed by an earlier message in this batch
+                if not future.done():
+                    future.set_result(None)
+            else:
+                claimed.append(item)
+        return claimed
+    
+    async def _release_claims(self, claim_keys: List[Optional[str]]):
+        """Drop the processed markers of messages whose writes failed, so a retry can write again"""
+        claim_keys = [claim_key for claim_key in claim_keys if claim_key]
+        if claim_keys:
+            try:
+                await self.redis_client.unlink(*claim_keys)
+            except Exception as e:
+                logger.warning("Failed to release dedup claims", claims=len(claim_keys), error=str(e))
+    
+    async def _bloom_claim(self, event_id: str, now: datetime) -> bool:
+        """Dedup through daily RedisBloom filters: new today and not seen yesterday"""
+        key = f"processed_bf:{_day_bucket(now.year, now.month, now.day)}"
+        if key != self._bloom_key:
+            await self._reserve_bloom(key)
+            self._bloom_key = key
+        
+        # Checking yesterday's filter too keeps the 24h window across the rotation
+        yesterday = now - timedelta(days=1)
+        previous_key = f"processed_bf:{_day_bucket(yesterday.year, yesterday.month, yesterday.day)}"
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            pipe.execute_command("BF.EXISTS", previous_key, event_id)
+            pipe.execute_command("BF.ADD", key, event_id)
+            seen_yesterday, added = await pipe.execute()
+        return bool(added) and not seen_yesterday
+    
+    async def _reserve_bloom(self, key: str):
+        """Create a day's dedup filter (idempotent); it expires once the next day's check is done with it"""
+        try:
+            await self.redis_client.execute_command(
+                "BF.RESERVE", key, config.redis_dedup_bloom_error_rate, config.redis_dedup_bloom_capacity)
+        except ResponseError as e:
+            if "exists" not in str(e):
+                raise
+        await self.redis_client.expire(key, 2 * self.cache_ttl_strategies['processed'])
+    
+    async def _encode_document(self, value: Any, compress: bool) -> bytes:
+        """
+        Serialize a message's main document
+        
+        When allowed, documents large enough to pay for the frame header are stored
+        zstd-compressed, and very large ones compress on a worker thread.
+        """
+        encoded = orjson.dumps(value, default=str)
+        if not compress or len(encoded) < config.redis_compress_min_bytes:
+            return encoded
+        if len(encoded) >= config.redis_offload_min_bytes:
+            # zstd releases the GIL while compressing; the shared compressor is not thread-safe
+            return await asyncio.to_thread(zstandard.ZstdCompressor(level=3).compress, encoded)
+        return self._compressor.compress(encoded)
+    
+    def _decode(self, raw: bytes) -> Any:
+        """Inverse of _encode_document; plain JSON values load as-is"""
+        if raw[:4] == _ZSTD_MAGIC:
+            raw = self._decompressor.decompress(raw)
+        return orjson.loads(raw)
+    
+    def _add_to_set(self, key: str, member: str, ttl: int):
+        """Coalesce a set addition into the pipeline batch being built"""
+        self._message_sets.append((key, member, ttl))
+    
+    def _store_experiment_cache(self, pipe: Pipeline, data: Dict[str, Any], document: bytes, cache_key: str) -> Dict[str, Any]:
+        """Queue experiment data in Redis cache"""
         ttl = self.cache_ttl_strategies['experiment']
         
         # Store experiment data
-        await self.redis_client.setex(cache_key, ttl, json.dumps(data))
+        pipe.setex(cache_key, ttl, document)
         
         # Store experiment variants separately for quick access
         if 'variants' in data:
             variants_key = f"{cache_key}:variants"
-            await self.redis_client.setex(variants_key, ttl, json.dumps(data['variants']))
+            pipe.setex(variants_key, ttl, orjson.dumps(data['variants'], default=str))
         
         return {
             'cache_key': cache_key,
             'ttl': ttl,
-            'stored_at': datetime.utcnow().isoformat(),
+            'stored_at': data['cached_at'],
             'type': 'experiment'
         }
     
-    async def _store_assignment_cache(self, data: Dict[str, Any], cache_key: str) -> Dict[str, Any]:
-        """Store assignment data in Redis cache"""
+    def _store_assignment_cache(self, pipe: Pipeline, data: Dict[str, Any], document: bytes, cache_key: str) -> Dict[str, Any]:
+        """Queue assignment data in Redis cache"""
         ttl = self.cache_ttl_strategies['assignment']
         
         # Store assignment data
-        await self.redis_client.setex(cache_key, ttl, json.dumps(data))
+        pipe.setex(cache_key, ttl, document)
         
         # Store user's experiment list for quick lookup
         user_id = data.get('user_id')
@@ -238,93 +558,96 @@ class RedisProcessor:
             experiment_id = data.get('experiment_id')
             
             # Add to set of user's experiments
-            await self.redis_client.sadd(user_experiments_key, str(experiment_id))
-            await self.redis_client.expire(user_experiments_key, ttl)
+            self._add_to_set(user_experiments_key, str(experiment_id), ttl)
         
         return {
             'cache_key': cache_key,
             'ttl': ttl,
-            'stored_at': datetime.utcnow().isoformat(),
+            'stored_at': data['cached_at'],
             'type': 'assignment'
         }
     
-    async def _store_user_cache(self, data: Dict[str, Any], cache_key: str) -> Dict[str, Any]:
-        """Store user data in Redis cache"""
+    def _store_user_cache(self, pipe: Pipeline, data: Dict[str, Any], document: bytes, cache_key: str) -> Dict[str, Any]:
+        """Queue user data in Redis cache"""
         ttl = self.cache_ttl_strategies['user_data']
         
         # Store user profile data
-        await self.redis_client.setex(cache_key, ttl, json.dumps(data))
+        pipe.setex(cache_key, ttl, document)
         
         # Store user segments for quick filtering
         if 'segment' in data:
             segment_key = f"segment:{data['segment']}:users"
             user_id = data.get('user_id')
-            await self.redis_client.sadd(segment_key, str(user_id))
-            await self.redis_client.expire(segment_key, ttl)
+            self._add_to_set(segment_key, str(user_id), ttl)
         
         return {
             'cache_key': cache_key,
             'ttl': ttl,
-            'stored_at': datetime.utcnow().isoformat(),
+            'stored_at': data['cached_at'],
             'type': 'user_data'
         }
     
-    async def _store_event_metrics(self, data: Dict[str, Any], cache_key: str) -> Dict[str, Any]:
-        """Store event metrics in Redis with aggregation"""
+    def _store_event_metrics(self, pipe: Pipeline, data: Dict[str, Any], document: bytes, cache_key: str,
+                             now: datetime) -> Dict[str, Any]:
+        """Queue event metrics in Redis with aggregation"""
         ttl = self.cache_ttl_strategies['event_metrics']
         
-        # Increment counter for metrics
-        current_count = await self.redis_client.incr(cache_key)
-        await self.redis_client.expire(cache_key, ttl)
-        
-        # Store detailed event data with TTL
+        # Counter, detailed event data and daily unique users (HyperLogLog, kept 2 days)
         event_data_key = f"{cache_key}:data"
-        await self.redis_client.setex(event_data_key, ttl, json.dumps(data))
+        unique_key = f"unique:{cache_key.split(':')[1]}:{_day_bucket(now.year, now.month, now.day)}"
+        # Free-form values must be encodable by redis-py, or the whole pipeline is rejected
+        user_id = data.get('user_id')
+        user_id = 'anonymous' if user_id is None else str(user_id)
+        
+        # Sharded counters spread a popular experiment's increments over several keys (cluster slots);
+        # xxh3 rather than hash() so a user maps to the same shard in every worker and across restarts
+        counter_key = cache_key
+        shards = config.redis_counter_shards
+        if shards > 1:
+            counter_key = f"{cache_key}:s{xxhash.xxh3_64_intdigest(user_id.encode()) % shards}"
         
-        # Update daily unique users using HyperLogLog
-        day = datetime.utcnow().strftime("%Y%m%d")
-        unique_key = f"unique:{cache_key.split(':')[1]}:{day}"
-        user_id = data.get('user_id', 'anonymous')
-        await self.redis_client.pfadd(unique_key, user_id)
-        await self.redis_client.expire(unique_key, 172800)  # 2 days
+        # Plain EVAL: Redis caches the compiled script by body, and unlike a pipelined EVALSHA
+        # there is no SCRIPT EXISTS round-trip per batch or NOSCRIPT after a server restart
+        pipe.eval(_EVENT_METRICS_SCRIPT, 3, counter_key, event_data_key, unique_key,
+                  ttl, document, user_id, 172800)
         
         return {
             'cache_key': cache_key,
-            'count': current_count,
             'ttl': ttl,
-            'stored_at': datetime.utcnow().isoformat(),
+            'stored_at': data['cached_at'],
             'type': 'event_metrics'
         }
     
-    async def _store_analytics_cache(self, data: Dict[str, Any], cache_key: str) -> Dict[str, Any]:
-        """Store analytics data in Redis cache"""
+    def _store_analytics_cache(self, pipe: Pipeline, data: Dict[str, Any], document: bytes, cache_key: str) -> Dict[str, Any]:
+        """Queue analytics data in Redis cache"""
         ttl = self.cache_ttl_strategies['analytics']
         
         # Store analytics data
-        await self.redis_client.setex(cache_key, ttl, json.dumps(data))
+        pipe.setex(cache_key, ttl, document)
         
         # Store aggregated metrics separately
         if 'metrics' in data:
             metrics_key = f"{cache_key}:metrics"
-            await self.redis_client.setex(metrics_key, ttl, json.dumps(data['metrics']))
+            pipe.setex(metrics_key, ttl, orjson.dumps(data['metrics'], default=str))
         
         return {
             'cache_key': cache_key,
             'ttl': ttl,
-            'stored_at': datetime.utcnow().isoformat(),
+            'stored_at': data['cached_at'],
             'type': 'analytics'
         }
     
-    async def _store_generic_cache(self, data: Dict[str, Any], cache_key: str, data_type: str) -> Dict[str, Any]:
-        """Store generic data in Redis cache"""
+    def _store_generic_cache(self, pipe: Pipeline, data: Dict[str, Any], document: bytes, cache_key: str,
+                             data_type: str) -> Dict[str, Any]:
+        """Queue generic data in Redis cache"""
         ttl = self.cache_ttl_strategies.get(data_type, self.cache_ttl_strategies['default'])
         
-        await self.redis_client.setex(cache_key, ttl, json.dumps(data))
+        pipe.setex(cache_key, ttl, document)
         
         return {
             'cache_key': cache_key,
             'ttl': ttl,
-            'stored_at': datetime.utcnow().isoformat(),
+            'stored_at': data['cached_at'],
             'type': 'generic'
         }
     
@@ -334,7 +657,7 @@ class RedisProcessor:
             data = await self.redis_client.get(cache_key)
             if data:
                 self.stats['cache_hits'] += 1
-                return json.loads(data)
+                return self._decode(data)
             else:
                 self.stats['cache_misses'] += 1
                 return None
@@ -343,19 +666,87 @@ class RedisProcessor:
             self.stats['cache_misses'] += 1
             return None
     
+    async def get_event_count(self, cache_key: str) -> int:
+        """Total of an event metrics counter, summed over its shards"""
+        shards = config.redis_counter_shards
+        if shards <= 1:
+            return int(await self.redis_client.get(cache_key) or 0)
+        
+        counts = await self.redis_client.mget([f"{cache_key}:s{shard}" for shard in range(shards)])
+        return sum(int(count) for count in counts if count)
+    
+    async def single_flight(self, cache_key: str, loader: Callable[[], Awaitable[Any]], ttl: int) -> Any:
+        """
+        Compute and cache the value for a cold key, letting only one caller run the loader
+        
+        Callers that lose the SET NX race poll for the winner's cached value, and run
+        the loader themselves only if the lock disappears without a value being cached.
+        Redis failures never block the loader.
+        """
+        lock_key = f"mcp:lock:{cache_key}"
+        token = uuid.uuid4().hex
+        try:
+            acquired = await self.redis_client.set(lock_key, token, nx=True, ex=config.single_flight_lock_ttl)
+        except Exception as e:
+            logger.warning("Single-flight lock failed", cache_key=cache_key, error=str(e))
+            return await loader()
+        
+        if not acquired:
+            cached = await self._wait_for_cached(cache_key, lock_key)
+            if cached is not None:
+                return cached
+        
+        try:
+            value = await loader()
+            try:
+                await self.redis_client.set(cache_key, orjson.dumps(value, default=str), ex=ttl, nx=True)
+            except Exception as e:
+                logger.warning("Single-flight cache write failed", cache_key=cache_key, error=str(e))
+            return value
+        finally:
+            if acquired:
+                try:
+                    await self._release_lock(keys=[lock_key], args=[token])
+                except Exception as e:
+                    logger.warning("Single-flight unlock failed", cache_key=cache_key, error=str(e))
+    
+    async def _wait_for_cached(self, cache_key: str, lock_key: str) -> Any:
+        """Poll until the lock holder caches a value (returned) or the lock goes away (None)"""
+        delay = 0.01
+        try:
+            while True:
+                cached, holder = await self.redis_client.mget(cache_key, lock_key)
+                if cached:
+                    return orjson.loads(cached)
+                if holder is None:
+                    return None
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 0.2)
+        except Exception as e:
+            logger.warning("Single-flight wait failed", cache_key=cache_key, error=str(e))
+            return None
+    
     async def invalidate_cache(self, pattern: str) -> int:
         """Invalidate cache keys matching pattern"""
         try:
+            # Unlink in bounded batches while scanning: memory is freed off Redis' main thread
+            # and no single command has to carry the whole match set
+            deleted = 0
             keys = []
-            async for key in self.redis_client.scan_iter(match=pattern):
-                keys.append(key)
+            # One dedicated connection for the whole walk instead of a pool checkout per command
+            async with self.redis_client.client() as conn:
+                async for key in conn.scan_iter(match=pattern, count=_SCAN_COUNT):
+                    keys.append(key)
+                    if len(keys) >= _INVALIDATE_BATCH:
+                        deleted += await conn.unlink(*keys)
+                        keys = []
+                
+                if keys:
+                    deleted += await conn.unlink(*keys)
             
-            if keys:
-                deleted = await self.redis_client.delete(*keys)
+            if deleted:
                 logger.info(f"Invalidated {deleted} cache keys matching pattern: {pattern}")
-                return deleted
-            
-            return 0
+            return deleted
         except Exception as e:
             logger.error(f"Failed to invalidate cache pattern {pattern}", error=str(e))
             return 0
@@ -369,8 +760,11 @@ class RedisProcessor:
             # Test with ping
             await self.redis_client.ping()
             
-            # Get Redis info
-            info = await self.redis_client.info()
+            # INFO is reused for a few seconds, and only the sections reported below are requested
+            fetched_at, info = self._info_cache
+            if info is None or time.monotonic() - fetched_at > config.redis_info_cache_ttl:
+                info = await self.redis_client.info('server', 'memory', 'clients', 'stats')
+                self._info_cache = (time.monotonic(), info)
             
             return {
                 'status': 'healthy',
@@ -393,6 +787,13 @@ class RedisProcessor:
     
     async def shutdown(self):
         """Clean shutdown of Redis processor"""
+        # Let queued writes reach Redis before stopping the flusher
+        if self._flush_task:
+            await self._write_queue.join()
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+            self._flush_task = None
+        
         if self.connection_pool:
             try:
                 await self.connection_pool.disconnect()
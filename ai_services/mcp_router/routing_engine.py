@@ -11,9 +11,10 @@ where to route it based on:
 It outputs a prioritized list of destinations for each data item.
 """
 
-from typing import Dict, Any, List, Optional, Set
+from typing import Dict, Any, List, Optional, Set, Tuple
 from enum import Enum
 import asyncio
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from structlog import get_logger
 
@@ -21,6 +22,9 @@ from .data_classifier import DataType, ProcessingType, StorageType
 
 logger = get_logger(__name__)
 
+# Number of distinct classifications whose routing plan is memoized
+ROUTING_PLAN_CACHE_SIZE = 8192
+
 
 class RoutingDecision(Enum):
     """Routing decision types"""
@@ -30,6 +34,18 @@ class RoutingDecision(Enum):
     SKIP = "skip"             # Don't route here
 
 
+@dataclass(slots=True)
+class RoutingTask:
+    """A classified payload queued for delivery to its destinations"""
+    data: Dict[str, Any]
+    classification: Dict[str, Any]
+    destinations: List[str]
+    source: str
+    timestamp: str
+    routing_id: str
+    payload: Optional[bytes] = None  # the router's serialized copy of data
+
+
 class RoutingEngine:
     """
     Intelligent routing engine that determines optimal data destinations
@@ -47,6 +63,9 @@ class RoutingEngine:
         self.routing_history = []
         self.load_balancer_state = {}
         
+        # Classification -> (destinations before load optimization, routing decisions), FIFO-evicted
+        self._plan_cache: Dict[Tuple, Tuple[Tuple[str, ...], Dict[str, RoutingDecision]]] = {}
+        
     async def determine_destinations(self, data: Dict[str, Any], 
                                    classification: Dict[str, Any]) -> List[str]:
         """
@@ -60,30 +79,24 @@ class RoutingEngine:
             List of destination names in priority order
         """
         try:
-            # Get basic routing from classification
-            storage_types = classification.get('storage_types', [])
             data_type = classification.get('data_type')
             priority = classification.get('priority', 5)
-            ai_enhanced = classification.get('ai_enhanced', False)
             
-            # Map storage types to destinations
-            destinations = []
-            routing_decisions = {}
-            
-            # Evaluate each potential destination
-            for storage_type in storage_types:
-                decision = await self._evaluate_destination(storage_type, data, classification)
-                routing_decisions[storage_type] = decision
-                
-                if decision in [RoutingDecision.PRIMARY, RoutingDecision.SECONDARY]:
-                    destinations.append(self._storage_type_to_destination(storage_type))
-            
-            # Add AI-enhanced destinations
-            if ai_enhanced:
-                destinations.append('chromadb')
-                
-            # Apply business rules and filters
-            destinations = self._apply_business_rules(destinations, data, classification)
+            # The rule-based plan depends only on the classification, so it is computed once per shape
+            plan_key = (
+                data_type,
+                classification.get('processing_type'),
+                tuple(classification.get('storage_types', ())),
+                priority,
+                classification.get('ai_enhanced', False)
+            )
+            plan = self._plan_cache.get(plan_key)
+            if plan is None:
+                plan = await self._plan_destinations(data, classification)
+                if len(self._plan_cache) >= ROUTING_PLAN_CACHE_SIZE:
+                    del self._plan_cache[next(iter(self._plan_cache))]
+                self._plan_cache[plan_key] = plan
+            destinations, routing_decisions = list(plan[0]), plan[1]
             
             # Load balancing and performance optimization
             destinations = await self._optimize_routing(destinations, data, classification)
@@ -105,6 +118,30 @@ class RoutingEngine:
             # Return safe default
             return ['postgresql']
     
+    async def _plan_destinations(self, data: Dict[str, Any], classification: Dict[str, Any]
+                                 ) -> Tuple[Tuple[str, ...], Dict[str, RoutingDecision]]:
+        """Destinations from classification and business rules, before load optimization"""
+        # Map storage types to destinations
+        destinations = []
+        routing_decisions = {}
+        
+        # Evaluate each potential destination
+        for storage_type in classification.get('storage_types', []):
+            decision = await self._evaluate_destination(storage_type, data, classification)
+            routing_decisions[storage_type] = decision
+            
+            if decision in [RoutingDecision.PRIMARY, RoutingDecision.SECONDARY]:
+                destinations.append(self._storage_type_to_destination(storage_type))
+        
+        # Add AI-enhanced destinations
+        if classification.get('ai_enhanced', False):
+            destinations.append('chromadb')
+            
+        # Apply business rules and filters
+        destinations = self._apply_business_rules(destinations, data, classification)
+        
+        return tuple(destinations), routing_decisions
+    
     async def _evaluate_destination(self, storage_type: str, data: Dict[str, Any], 
                                   classification: Dict[str, Any]) -> RoutingDecision:
         """Evaluate whether to route to a specific destination"""
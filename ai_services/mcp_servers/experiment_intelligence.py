@@ -28,6 +28,7 @@ from contextlib import asynccontextmanager
 from structlog import get_logger
 
 from ..core.config import config
+from ..core.logging_setup import configure_logging
 from ..core.chromadb_manager import vector_store
 
 
@@ -815,6 +816,7 @@ intelligence_server = ExperimentIntelligenceServer()
 # FastAPI app setup
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    configure_logging()
     await intelligence_server.initialize()
     yield
 
@@ -869,5 +871,6 @@ if __name__ == "__main__":
         "ai_services.mcp_servers.experiment_intelligence:app",
         host="0.0.0.0",
         port=config.mcp_port,
-        log_level=config.log_level.lower()
+        log_level=config.log_level.lower(),
+        loop="uvloop"
     )
@@ -15,20 +15,20 @@ the new AI-enhanced MCP system.
 """
 
 import asyncio
-import json
 import signal
 import sys
 from typing import Dict, Any, List, Optional, Set
 from datetime import datetime
-import traceback
 from contextlib import asynccontextmanager
 
 from aiokafka import AIOKafkaConsumer
 from aiokafka.errors import KafkaError
 import httpx
+import orjson
 from structlog import get_logger
 
 from ..core.config import config
+from ..core.logging_setup import configure_logging
 
 
 logger = get_logger(__name__)
@@ -174,9 +174,8 @@ class KafkaMCPProcessor:
             except KafkaError as e:
                 logger.error("Kafka error", error=str(e))
                 await asyncio.sleep(5)  # Wait before retrying
-            except Exception as e:
-                logger.error("Unexpected error in processing loop", 
-                           error=str(e), traceback=traceback.format_exc())
+            except Exception:
+                logger.error("Unexpected error in processing loop", exc_info=True)
                 await asyncio.sleep(1)
     
     async def _process_message(self, message, topic: str):
@@ -231,8 +230,7 @@ class KafkaMCPProcessor:
             logger.error("Failed to process message",
                         topic=topic,
                         offset=getattr(message, 'offset', None),
-                        error=str(e),
-                        traceback=traceback.format_exc())
+                        exc_info=True)
             raise
     
     async def _route_through_mcp(self, data: Dict[str, Any], topic: str) -> Dict[str, Any]:
@@ -246,12 +244,17 @@ class KafkaMCPProcessor:
             }
             
             # Send to MCP Router
-            response = await self.mcp_client.post("/route", json=routing_data, timeout=30.0)
+            response = await self.mcp_client.post(
+                "/route",
+                content=orjson.dumps(routing_data, default=str),
+                headers={'Content-Type': 'application/json'},
+                timeout=30.0
+            )
             
             if response.status_code == 200:
                 return {
                     'status': 'success',
-                    **response.json()
+                    **orjson.loads(response.content)
                 }
             else:
                 return {
@@ -277,9 +280,9 @@ class KafkaMCPProcessor:
                 return {}
             
             # Try JSON deserialization
-            return json.loads(serialized_value.decode('utf-8'))
+            return orjson.loads(serialized_value)
             
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             logger.warning("Failed to deserialize message as JSON", error=str(e))
             # Return raw string in a dict
             return {
@@ -348,6 +351,7 @@ processor = KafkaMCPProcessor()
 
 async def main():
     """Main entry point"""
+    configure_logging()
     try:
         logger.info("Starting Kafka MCP Stream Processor")
         
@@ -359,8 +363,8 @@ async def main():
         
     except KeyboardInterrupt:
         logger.info("Keyboard interrupt received")
-    except Exception as e:
-        logger.error("Fatal error", error=str(e), traceback=traceback.format_exc())
+    except Exception:
+        logger.error("Fatal error", exc_info=True)
         sys.exit(1)
     finally:
         logger.info("Stream processor exiting")
@@ -371,9 +375,13 @@ if __name__ == "__main__":
     if sys.platform == 'win32':
         asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
     
-    # Run the main function
+    # Run the main function, on uvloop where it is available (not on Windows)
     try:
-        asyncio.run(main())
+        if sys.platform == 'win32':
+            asyncio.run(main())
+        else:
+            import uvloop
+            uvloop.run(main())
     except KeyboardInterrupt:
         logger.info("Process interrupted by user")
     except Exception as e:
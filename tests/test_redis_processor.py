@@ -0,0 +1,218 @@
+"""Tests for the MCP Redis processor's batched write path."""
+
+import asyncio
+
+import pytest
+import pytest_asyncio
+from redis.exceptions import ConnectionError, DataError, ResponseError
+
+from ai_services.mcp_router.redis_processor import RedisProcessor
+from ai_services.mcp_router.routing_engine import RoutingTask
+
+
+class FakePipeline:
+    """Records queued commands and answers them from the owning FakeRedis."""
+
+    def __init__(self, client):
+        self.client = client
+        self.command_stack = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.command_stack = []
+
+    def __len__(self):
+        return len(self.command_stack)
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.command_stack.append((name, args, kwargs))
+        return queue
+
+    async def execute(self, raise_on_error=True):
+        self.client.executed.append(list(self.command_stack))
+        if self.client.raise_on_execute is not None:
+            error = self.client.raise_on_execute(self.command_stack)
+            if error is not None:
+                raise error
+        return [self.client.reply(name, args, kwargs) for name, args, kwargs in self.command_stack]
+
+
+class FakeRedis:
+    """Just enough of redis.asyncio.Redis for the processor's flusher."""
+
+    def __init__(self):
+        self.keys = set()
+        self.unlinked = []
+        self.executed = []
+        self.error_replies = {}  # key -> exception returned as that key's reply
+        self.raise_on_execute = None  # command stack -> exception raised by execute, or None
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def reply(self, name, args, kwargs):
+        key = args[2] if name == "eval" else args[0]
+        if key in self.error_replies:
+            return self.error_replies[key]
+        if name == "set" and kwargs.get("nx"):
+            if key in self.keys:
+                return None
+            self.keys.add(key)
+            return True
+        self.keys.add(key)
+        return 1
+
+    async def unlink(self, *keys):
+        self.unlinked.extend(keys)
+        self.keys.difference_update(keys)
+        return len(keys)
+
+
+@pytest_asyncio.fixture
+async def processor():
+    """A RedisProcessor wired to a FakeRedis with its flusher running."""
+    redis_processor = RedisProcessor()
+    redis_processor.redis_client = FakeRedis()
+    redis_processor._write_queue = asyncio.Queue()
+    redis_processor._flush_task = asyncio.create_task(redis_processor._flusher())
+    yield redis_processor
+    await redis_processor.shutdown()
+
+
+def _assignment(event_id, experiment_id="exp_1", user_id="user_1"):
+    data = {"event_id": event_id, "experiment_id": experiment_id, "user_id": user_id}
+    task = RoutingTask(
+        data=data,
+        classification={"data_type": "assignment"},
+        destinations=["redis"],
+        source="test",
+        timestamp="2024-01-01T00:00:00",
+        routing_id=f"route_{event_id}",
+    )
+    return data, task
+
+
+def _queued(client, name):
+    """Every command of the given name sent in a write pipeline"""
+    return [(args, kwargs) for stack in client.executed for cmd, args, kwargs in stack if cmd == name]
+
+
+class TestRedisProcessorBatching:
+    """Claim -> write -> release flow of the shared pipeline flusher."""
+
+    @pytest.mark.asyncio
+    async def test_redelivered_event_is_a_duplicate(self, processor):
+        """A second message with the same event_id loses its claim and writes nothing."""
+        first = await processor.process_data(*_assignment("evt_1"))
+        second = await processor.process_data(*_assignment("evt_1"))
+
+        assert first["type"] == "assignment"
+        assert second["status"] == "cached"
+        assert len(_queued(processor.redis_client, "setex")) == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_write_reply_releases_claim(self, processor):
+        """An error reply fails only its own message and drops its processed marker."""
+        client = processor.redis_client
+        client.error_replies["assignment:exp_bad:user_1"] = ResponseError("OOM")
+
+        results = await asyncio.gather(
+            processor.process_data(*_assignment("evt_bad", experiment_id="exp_bad")),
+            processor.process_data(*_assignment("evt_ok")),
+            return_exceptions=True,
+        )
+
+        assert isinstance(results[0], ResponseError)
+        assert results[1]["type"] == "assignment"
+        assert client.unlinked == ["processed:evt_bad"]
+
+    @pytest.mark.asyncio
+    async def test_queue_failure_discards_partial_writes(self, processor, monkeypatch):
+        """Commands and set additions queued before queue_writes raised never run."""
+        client = processor.redis_client
+
+        def broken_store(pipe, data, document, cache_key):
+            pipe.setex(cache_key, 60, document)
+            processor._add_to_set("segment:broken:users", "user_2", 60)
+            raise ValueError("bad user document")
+
+        monkeypatch.setattr(processor, "_store_user_cache", broken_store)
+        data, task = _assignment("evt_user", user_id="user_2")
+        task.classification = {"data_type": "user_data"}
+
+        results = await asyncio.gather(
+            processor.process_data(data, task),
+            processor.process_data(*_assignment("evt_ok")),
+            return_exceptions=True,
+        )
+
+        assert isinstance(results[0], ValueError)
+        assert results[1]["type"] == "assignment"
+        assert [args[0] for args, _ in _queued(client, "setex")] == ["assignment:exp_1:user_1"]
+        assert [args[0] for args, _ in _queued(client, "sadd")] == ["user:user_1:experiments"]
+        assert client.unlinked == ["processed:evt_user"]
+
+    @pytest.mark.asyncio
+    async def test_set_write_error_fails_contributing_messages(self, processor):
+        """An error on a coalesced SADD fails every message that added to that set."""
+        client = processor.redis_client
+        client.error_replies["user:user_bad:experiments"] = ResponseError("WRONGTYPE")
+
+        results = await asyncio.gather(
+            processor.process_data(*_assignment("evt_1", user_id="user_bad")),
+            processor.process_data(*_assignment("evt_2", experiment_id="exp_2", user_id="user_bad")),
+            processor.process_data(*_assignment("evt_3")),
+            return_exceptions=True,
+        )
+
+        assert isinstance(results[0], ResponseError)
+        assert isinstance(results[1], ResponseError)
+        assert results[2]["type"] == "assignment"
+        assert sorted(client.unlinked) == ["processed:evt_1", "processed:evt_2"]
+
+    @pytest.mark.asyncio
+    async def test_encoding_error_is_isolated_per_message(self, processor):
+        """A client-side DataError is retried message by message so only the bad one fails."""
+        client = processor.redis_client
+
+        def reject_bad(stack):
+            if any(args and args[0] == "assignment:exp_bad:user_1" for _, args, _ in stack):
+                return DataError("Invalid input of type: 'dict'")
+            return None
+
+        client.raise_on_execute = reject_bad
+
+        results = await asyncio.gather(
+            processor.process_data(*_assignment("evt_bad", experiment_id="exp_bad")),
+            processor.process_data(*_assignment("evt_ok")),
+            return_exceptions=True,
+        )
+
+        assert isinstance(results[0], DataError)
+        assert results[1]["type"] == "assignment"
+        assert client.unlinked == ["processed:evt_bad"]
+
+    @pytest.mark.asyncio
+    async def test_connection_error_fails_batch_without_replay(self, processor):
+        """A connection failure fails the whole batch once and releases every claim."""
+        client = processor.redis_client
+
+        def drop_writes(stack):
+            if any(name == "setex" for name, _, _ in stack):
+                return ConnectionError("Connection reset by peer")
+            return None
+
+        client.raise_on_execute = drop_writes
+
+        results = await asyncio.gather(
+            processor.process_data(*_assignment("evt_1")),
+            processor.process_data(*_assignment("evt_2", experiment_id="exp_2")),
+            return_exceptions=True,
+        )
+
+        assert all(isinstance(result, ConnectionError) for result in results)
+        assert len([stack for stack in client.executed if any(name == "setex" for name, _, _ in stack)]) == 1
+        assert sorted(client.unlinked) == ["processed:evt_1", "processed:evt_2"]